@@ -5,7 +5,8 @@ settings via `get_settings()`.
 """
 
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Optional
+import json
 import os
 from pathlib import Path
 
@@ -46,9 +47,22 @@ class Settings:
         self.US_SUPPORT_QUEUE_SID: Optional[str] = os.getenv("US_SUPPORT_QUEUE_SID")
         self.INDIA_SUPPORT_QUEUE_SID: Optional[str] = os.getenv("INDIA_SUPPORT_QUEUE_SID")
 
+        # Redis shared by all workers for the verified-numbers cache (optional)
+        self.REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+
         # Prefer this verified Twilio number for outbound Caller ID when set
         self.TWILIO_CALLER_ID: Optional[str] = os.getenv("TWILIO_CALLER_ID")
 
+        # Fraction of events persisted per event type, e.g.
+        # {"GEMINI_MODERATION_RESULT": 0.1}; unlisted types are always stored
+        try:
+            raw_rates = json.loads(os.getenv("EVENT_SAMPLE_RATES", "") or "{}")
+            if not isinstance(raw_rates, dict):
+                raise TypeError("not a JSON object")
+            self.EVENT_SAMPLE_RATES: Dict[str, float] = {str(k): float(v) for k, v in raw_rates.items()}
+        except (TypeError, ValueError):
+            raise RuntimeError("EVENT_SAMPLE_RATES must be a JSON object of event type to numeric rate")
+
         # Basic validation
         if not self.DATABASE_URL:
             raise RuntimeError("DATABASE_URL environment variable is required")
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import base64
 
 from backend.config import get_settings
@@ -61,6 +62,35 @@ def on_startup() -> None:
     config_service.initialize_config()
 
 
+@app.on_event("startup")
+async def start_background_refreshers() -> None:
+    """Start background tasks that keep hot webhook caches warm."""
+    settings = get_settings()
+    # Open the Twilio TLS connection in the background so startup isn't delayed
+    from backend.services.twilio_service import warm_twilio_client
+    app.state.twilio_warmup_task = asyncio.create_task(asyncio.to_thread(warm_twilio_client))
+
+    # Verified numbers from env take precedence over the Twilio lookup
+    if not settings.VERIFIED_OUTBOUND_NUMBERS:
+        from backend.services.twilio_service import run_verified_numbers_refresher
+        app.state.verified_numbers_task = asyncio.create_task(run_verified_numbers_refresher())
+
+
+@app.on_event("shutdown")
+async def stop_background_refreshers() -> None:
+    """Cancel background refresh tasks on shutdown."""
+    task = getattr(app.state, "verified_numbers_task", None)
+    if task:
+        task.cancel()
+
+    from backend.services.twilio_service import close_async_twilio_client
+    await close_async_twilio_client()
+
+    # Give the event writer a chance to persist what is still queued
+    from backend.services.logger import flush_event_log
+    await asyncio.to_thread(flush_event_log)
+
+
 # Include package-level router that aggregates all route modules
 app.include_router(routes_router)
 app.include_router(admin_router)
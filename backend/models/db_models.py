@@ -168,6 +168,7 @@ class AgentSpecialization(Base):
     __table_args__ = (
         Index("idx_spec_agent", "agent_id"),
         Index("idx_spec_category", "category"),
+        Index("idx_spec_category_proficiency", "category", proficiency_level.desc()),
     )
 
 
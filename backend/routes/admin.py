@@ -1,5 +1,7 @@
 """Admin API routes for managing greetings, agents, and corrections."""
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from backend.config import get_settings
 from pydantic import BaseModel
@@ -9,8 +11,9 @@ from backend.db import SessionLocal
 from backend.models.db_models import Agent, AgentSpecialization, MisheardCorrection, VoiceGreeting, VoicePrompt
 from backend.services import config_service
 from backend.services import gemini_service
+from backend.services import twilio_service
 from backend.services.default_prompts import DEFAULT_GREETINGS, DEFAULT_IVR_PROMPTS
-from backend.services.logger import log_event
+from backend.services.logger import dropped_event_count, log_event
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -594,4 +597,16 @@ async def cache_status():
         "agents_count": len(config_service._cache.get("agents", [])),
         "corrections_count": len(config_service._cache.get("corrections", {})),
         "last_refresh": str(config_service._cache.get("last_refresh")),
+        "dropped_events": dropped_event_count(),
     }
+
+
+@router.post("/refresh-verified-numbers")
+async def refresh_verified_numbers():
+    """Re-fetch verified numbers from Twilio now, e.g. after adding caller IDs.
+
+    Both Twilio list endpoints are paged concurrently over the shared pooled
+    client; the fetch runs in a worker thread so webhooks keep being served.
+    """
+    nums = await asyncio.to_thread(twilio_service.refresh_verified_numbers, force=True)
+    return {"status": "refreshed", "count": len(nums)}
@@ -7,18 +7,20 @@ New simplified flow:
 """
 from __future__ import annotations
 
+import asyncio
 import re
+import zlib
 
 from fastapi import APIRouter, Request, Response
 from twilio.twiml.voice_response import Gather, VoiceResponse, Dial
-from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 
 from backend.config import get_settings
+from backend.db import SessionLocal
 from backend.services import config_service
 from backend.services import gemini_service
 from backend.services.agent_selector import get_agent_candidates
-from backend.services.calls import ensure_call_from_twilio
+from backend.services.calls import ensure_call_from_twilio, resolve_call_id
 from backend.services.leads import (
     derive_language_from_lead,
     get_lead_by_call_sid,
@@ -35,7 +37,13 @@ from backend.services.leads import (
     get_caller_description,
 )
 from backend.services.logger import log_event, logger as event_logger
-from backend.services.twilio_service import get_verified_numbers
+from backend.services.twilio_service import (
+    country_prefix,
+    get_twilio_client,
+    get_verified_numbers,
+    get_verified_numbers_by_prefix,
+    group_by_country_prefix,
+)
 from backend.services.crm_service import create_lead_in_crm
 
 
@@ -109,8 +117,12 @@ _CATEGORY_HINTS = (
     "necklace, necklaces, bangles, bracelets, earrings, rings, accessories, curated combination, men jewellery, vintage diamonds"
 )
 
-# Twilio REST client for status lookups
-twilio_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+# Shared Twilio REST client for status lookups
+twilio_client = get_twilio_client()
+
+# Numbers configured via VERIFIED_OUTBOUND_NUMBERS, as a set and as caller ID pools
+_CONFIGURED_VERIFIED = frozenset(getattr(settings, "VERIFIED_OUTBOUND_NUMBERS", []))
+_CONFIGURED_CALLER_ID_POOLS = group_by_country_prefix(_CONFIGURED_VERIFIED)
 
 
 def _get_prompt(key: str) -> str:
@@ -122,14 +134,30 @@ def _get_prompt(key: str) -> str:
         return text
 
 
+_TRANSCRIPT_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+
+class _TranscriptTable(dict):
+    """`str.translate` table that lowercases and blanks non-alphanumerics.
+
+    Characters are resolved on first sight and memoized, so the table matches
+    `lower()` followed by replacing anything outside ``[a-z0-9]`` with a space.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        mapped = "".join(c if c in _TRANSCRIPT_CHARS else " " for c in chr(codepoint).lower())
+        self[codepoint] = mapped
+        return mapped
+
+
+_TRANSCRIPT_TABLE = _TranscriptTable()
+
+
 def _normalize_transcript(text: str | None) -> str:
     """Normalize speech transcript for matching."""
     if not text:
         return ""
-    lowered = text.lower()
-    lowered = re.sub(r"[^a-z0-9\s]", " ", lowered)
-    lowered = re.sub(r"\s+", " ", lowered).strip()
-    return lowered
+    return " ".join(text.translate(_TRANSCRIPT_TABLE).split())
 
 
 def _resolve_category(speech: str | None) -> str | None:
@@ -190,9 +218,9 @@ async def voice(request: Request) -> Response:
     from_number = form.get("From")
 
     # Create/update call record
-    call = ensure_call_from_twilio(form)
-    if call:
-        link_lead_to_call(call_sid, call.id)
+    call_id = await asyncio.to_thread(ensure_call_from_twilio, form)
+    if call_id:
+        await asyncio.to_thread(link_lead_to_call, call_sid, call_id)
 
     log_event(call_sid, "CALL_RECEIVED", {
         "from": from_number,
@@ -249,7 +277,7 @@ async def voice_intent(request: Request) -> Response:
     if not intent:
         # Could not determine intent - play "invalid" and reprompt menu.
         log_event(call_sid, "INTENT_NOT_RECOGNIZED", {"speech": speech_result})
-        record_intent(call_sid, "unknown")
+        await asyncio.to_thread(record_intent, call_sid, "unknown")
 
         response = VoiceResponse()
 
@@ -280,7 +308,7 @@ async def voice_intent(request: Request) -> Response:
         return Response(content=str(response), media_type="application/xml")
 
     # Persist choice
-    record_intent(call_sid, intent)
+    await asyncio.to_thread(record_intent, call_sid, intent)
     log_event(call_sid, "INTENT_SELECTED", {"intent": intent, "speech": speech_result})
 
     # Ask for caller's name before continuing
@@ -319,7 +347,7 @@ async def voice_name(request: Request) -> Response:
     if caller_name:
         # Run profanity/safety check via Gemini (or fallback blacklist)
         try:
-            profane = gemini_service.is_profane(caller_name)
+            profane = await gemini_service.is_profane_async(caller_name)
         except Exception:
             profane = False
 
@@ -346,7 +374,7 @@ async def voice_name(request: Request) -> Response:
             return Response(content=str(response), media_type="application/xml")
 
         # Acceptable name
-        record_caller_name(call_sid, caller_name)
+        await asyncio.to_thread(record_caller_name, call_sid, caller_name)
         log_event(call_sid, "CALLER_NAME_CAPTURED", {"name": caller_name})
     else:
         log_event(call_sid, "CALLER_NAME_NOT_PROVIDED", {})
@@ -368,7 +396,7 @@ async def voice_name_fallback(request: Request) -> Response:
 
 async def _continue_after_name(call_sid: str, from_number: str | None) -> Response:
     """Continue the IVR flow based on stored intent after name collection."""
-    lead = get_lead_by_call_sid(call_sid)
+    lead = await asyncio.to_thread(get_lead_by_call_sid, call_sid)
     intent = lead.extra_metadata.get("intent") if lead and lead.extra_metadata else None
 
     log_event(call_sid, "INTENT_LOOKUP_AFTER_NAME", {
@@ -427,7 +455,7 @@ async def _continue_after_name(call_sid: str, from_number: str | None) -> Respon
         return Response(content=str(response), media_type="application/xml")
 
     # Unknown intent - connect to default agent
-    return _connect_to_default_agent(call_sid, from_number)
+    return await _connect_to_default_agent(call_sid, from_number)
 
 
 def _resolve_intent(speech: str | None) -> str | None:
@@ -498,7 +526,7 @@ async def voice_assist_type(request: Request) -> Response:
         response.redirect("/voice/name-fallback")
         return Response(content=str(response), media_type="application/xml")
 
-    record_assist_type(call_sid, choice)
+    await asyncio.to_thread(record_assist_type, call_sid, choice)
     log_event(call_sid, "ASSIST_TYPE_SELECTED", {"assist_type": choice})
 
     response = VoiceResponse()
@@ -569,21 +597,24 @@ def _resolve_assist_type(speech: str | None) -> str | None:
     return None
 
 
-def _infer_category_from_product_name(call_sid: str, product_name: str) -> None:
+def _infer_category_from_product_name(call_sid: str, product_name: str, lead=None):
     """Infer and store category from a spoken product name, if not already set.
 
     Uses the same category resolver as explicit category questions and only
     writes selected_category if we can confidently map into ALLOWED_IVR_CATEGORIES.
+    No session is held while classifying; the category is written in its own
+    short transaction. Returns the lead as it stands afterwards.
     """
     from backend.services.leads import get_lead_by_call_sid as _get_lead, record_category_selection as _record_cat
 
     if not product_name:
-        return
+        return lead
 
-    lead = _get_lead(call_sid)
+    if lead is None:
+        lead = _get_lead(call_sid)
     existing = getattr(lead, "selected_category", None) if lead else None
     if existing:
-        return
+        return lead
 
     # First try the rule-based resolver
     resolved = _resolve_category(product_name)
@@ -591,30 +622,32 @@ def _infer_category_from_product_name(call_sid: str, product_name: str) -> None:
     if not resolved:
         try:
             from backend.services import gemini_service
-            allowed = [
-                "necklace",
-                "bangles",
-                "bracelets",
-                "earrings",
-                "curated combination",
-                "accessories",
-                "men jewellery",
-                "rings",
-                "vintage diamonds",
-            ]
-            gemini_cat = gemini_service.infer_category_from_product(product_name, allowed)
+            gemini_cat = gemini_service.infer_category_from_product(product_name, ALLOWED_IVR_CATEGORIES)
             if gemini_cat:
                 resolved = gemini_cat
         except Exception:
             resolved = None
 
     if resolved:
-        _record_cat(call_sid, resolved)
+        lead = _record_cat(call_sid, resolved) or lead
         log_event(call_sid, "CATEGORY_INFERRED_FROM_PRODUCT_NAME", {"category": resolved, "raw_product_name": product_name})
+    return lead
 
 
 # ==================== PRODUCT NAME COLLECTION ====================
 
+def _record_product_name(call_sid: str, product_name: str):
+    """Store the product name, then infer and store its category.
+
+    Runs in a worker thread: the DB round trips and the Gemini fallback would
+    otherwise block the event loop for every other call in flight. The product
+    upsert commits before classification starts, so the lead row lock and the
+    pooled connection are not held across the Gemini call.
+    """
+    lead = record_product_id(call_sid, product_name)
+    return _infer_category_from_product_name(call_sid, product_name, lead)
+
+
 @router.post("/voice/product-id")
 async def voice_product_id(request: Request) -> Response:
     """Collect product name and connect to agent."""
@@ -627,8 +660,7 @@ async def voice_product_id(request: Request) -> Response:
 
     if product_name:
         # store product name (we reuse the product_id column)
-        record_product_id(call_sid, product_name)
-        _infer_category_from_product_name(call_sid, product_name)
+        lead = await asyncio.to_thread(_record_product_name, call_sid, product_name)
         log_event(call_sid, "PRODUCT_NAME_CAPTURED", {"product_name": product_name})
     else:
         log_event(call_sid, "PRODUCT_NAME_NOT_PROVIDED", {})
@@ -660,14 +692,13 @@ async def voice_product_id(request: Request) -> Response:
         return Response(content=str(response), media_type="application/xml")
 
     # Directly route to agent and sync CRM using collected data
-    lead = get_lead_by_call_sid(call_sid)
     category = getattr(lead, "selected_category", None)
     currency = getattr(lead, "currency", None)
 
-    _sync_crm_lead_for_call(call_sid, from_number, None)
+    await asyncio.to_thread(_sync_crm_lead_for_call, call_sid, from_number, None)
 
     response = VoiceResponse()
-    _append_dial_instruction(response, call_sid, category, currency, from_number)
+    await asyncio.to_thread(_append_dial_instruction, response, call_sid, category, currency, from_number)
     return Response(content=str(response), media_type="application/xml")
 
 
@@ -687,7 +718,7 @@ async def voice_product_category(request: Request) -> Response:
     resolved_category = _resolve_category(raw_category)
 
     if resolved_category:
-        record_category_selection(call_sid, resolved_category)
+        await asyncio.to_thread(record_category_selection, call_sid, resolved_category)
         log_event(call_sid, "PRODUCT_CATEGORY_CAPTURED", {"category": resolved_category, "raw": raw_category})
     elif raw_category:
         # Spoken input present, but not in allowed list
@@ -782,8 +813,7 @@ async def voice_price_product(request: Request) -> Response:
     product_name = (speech_result or "").strip()
     
     if product_name:
-        record_product_id(call_sid, product_name)
-        _infer_category_from_product_name(call_sid, product_name)
+        lead = await asyncio.to_thread(_record_product_name, call_sid, product_name)
         log_event(call_sid, "PRICE_PRODUCT_NAME_CAPTURED", {"product_name": product_name})
     else:
         log_event(call_sid, "PRICE_PRODUCT_NAME_NOT_PROVIDED", {})
@@ -811,14 +841,13 @@ async def voice_price_product(request: Request) -> Response:
         return Response(content=str(response), media_type="application/xml")
 
     # Directly route to agent and sync CRM using collected data
-    lead = get_lead_by_call_sid(call_sid)
     category = getattr(lead, "selected_category", None)
     currency = getattr(lead, "currency", None)
 
-    _sync_crm_lead_for_call(call_sid, from_number, None)
+    await asyncio.to_thread(_sync_crm_lead_for_call, call_sid, from_number, None)
 
     response = VoiceResponse()
-    _append_dial_instruction(response, call_sid, category, currency, from_number)
+    await asyncio.to_thread(_append_dial_instruction, response, call_sid, category, currency, from_number)
     return Response(content=str(response), media_type="application/xml")
 
 
@@ -836,7 +865,7 @@ async def voice_category_name(request: Request) -> Response:
     resolved_category = _resolve_category(raw_category)
 
     if resolved_category:
-        record_category_selection(call_sid, resolved_category)
+        await asyncio.to_thread(record_category_selection, call_sid, resolved_category)
         log_event(call_sid, "CATEGORY_NAME_CAPTURED", {"category": resolved_category, "raw": raw_category})
     elif raw_category:
         log_event(call_sid, "CATEGORY_NAME_NOT_RECOGNIZED", {"speech": raw_category, "allowed": list(ALLOWED_IVR_CATEGORIES)})
@@ -894,14 +923,14 @@ async def voice_category_name(request: Request) -> Response:
         return Response(content=str(response), media_type="application/xml")
 
     # Directly route to agent and sync CRM using collected data
-    lead = get_lead_by_call_sid(call_sid)
+    lead = await asyncio.to_thread(get_lead_by_call_sid, call_sid)
     selected_category = resolved_category if resolved_category else getattr(lead, "selected_category", None)
 
     # Ensure CRM lead is sent even if /voice/description is never hit
-    _sync_crm_lead_for_call(call_sid, from_number, None)
+    await asyncio.to_thread(_sync_crm_lead_for_call, call_sid, from_number, None)
 
     response = VoiceResponse()
-    _append_dial_instruction(response, call_sid, selected_category, getattr(lead, "currency", None), from_number)
+    await asyncio.to_thread(_append_dial_instruction, response, call_sid, selected_category, getattr(lead, "currency", None), from_number)
     return Response(content=str(response), media_type="application/xml")
 
 
@@ -917,12 +946,12 @@ async def voice_description(request: Request) -> Response:
 
     description = (speech_result or "").strip()
     
+    # Get all collected lead data (the write returns the updated lead)
     if description:
-        record_description(call_sid, description)
+        lead = await asyncio.to_thread(record_description, call_sid, description)
         log_event(call_sid, "CALLER_DESCRIPTION_CAPTURED", {"description": description})
-
-    # Get all collected lead data
-    lead = get_lead_by_call_sid(call_sid)
+    else:
+        lead = await asyncio.to_thread(get_lead_by_call_sid, call_sid)
     category = getattr(lead, "selected_category", None)
     product_id = getattr(lead, "product_id", None)
     
@@ -937,11 +966,11 @@ async def voice_description(request: Request) -> Response:
             caller_description = lead.extra_metadata.get("caller_description")
 
     # Create/update CRM lead before routing
-    _sync_crm_lead_for_call(call_sid, from_number, caller_description)
+    await asyncio.to_thread(_sync_crm_lead_for_call, call_sid, from_number, caller_description)
 
     # Connect to agent
     response = VoiceResponse()
-    _append_dial_instruction(response, call_sid, category, getattr(lead, "currency", None), from_number)
+    await asyncio.to_thread(_append_dial_instruction, response, call_sid, category, getattr(lead, "currency", None), from_number)
     return Response(content=str(response), media_type="application/xml")
 
 
@@ -954,57 +983,49 @@ def _sync_crm_lead_for_call(call_sid: str, from_number: str | None, override_des
     (intent, name, category/product, description) is sent to CRM.
     """
     # Avoid duplicate CRM leads: if we've already synced one for this call, skip
-    from backend.db import SessionLocal
-    from backend.models.db_models import Call, CallEvent
-    from datetime import datetime
-
-    db = SessionLocal()
-    try:
-        call = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-        if call:
-            existing = db.query(CallEvent).filter(
-                CallEvent.call_id == call.id,
-                CallEvent.event_type.in_(["CRM_LEAD_CREATED", "CRM_LEAD_SYNCED"]),
-            ).first()
-            if existing:
-                return
-    except Exception:
-        # If we can't check, continue and attempt to create
-        pass
-    finally:
-        db.close()
+    from backend.models.db_models import CallEvent
 
-    # Gather latest lead data
-    lead = get_lead_by_call_sid(call_sid)
-    category = getattr(lead, "selected_category", None)
-    product_id = getattr(lead, "product_id", None)
-
-    caller_name = None
-    intent = None
-    caller_description = override_description
-    if lead and lead.extra_metadata:
-        caller_name = lead.extra_metadata.get("caller_name")
-        intent = lead.extra_metadata.get("intent")
-        if not caller_description:
-            caller_description = lead.extra_metadata.get("caller_description")
-
-    # Fallback: if caller_name is still missing, read it from the last
-    # CALLER_NAME_CAPTURED event for this call so CRM always sees the name
-    if not caller_name:
-        from backend.db import SessionLocal as _SessionLocal
-        from backend.models.db_models import Call as _Call, CallEvent as _CallEvent
-        db2 = _SessionLocal()
+    # One session for the dedupe check, lead read and name fallback; it is
+    # closed before the CRM request so no connection is held during it
+    with SessionLocal() as db:
+        call_id = None
         try:
-            call_row = db2.query(_Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-            q = db2.query(_CallEvent).filter(_CallEvent.event_type == "CALLER_NAME_CAPTURED")
-            if call_row:
-                q = q.filter(_CallEvent.call_id == call_row.id)
-            q = q.order_by(_CallEvent.created_at.desc())
+            call_id = resolve_call_id(db, call_sid)
+            if call_id:
+                existing = db.query(CallEvent).filter(
+                    CallEvent.call_id == call_id,
+                    CallEvent.event_type.in_(["CRM_LEAD_CREATED", "CRM_LEAD_SYNCED"]),
+                ).first()
+                if existing:
+                    return
+        except Exception:
+            # If we can't check, continue and attempt to create
+            db.rollback()
+
+        # Gather latest lead data
+        lead = get_lead_by_call_sid(call_sid, db=db)
+        category = getattr(lead, "selected_category", None)
+        product_id = getattr(lead, "product_id", None)
+
+        caller_name = None
+        intent = None
+        caller_description = override_description
+        if lead and lead.extra_metadata:
+            caller_name = lead.extra_metadata.get("caller_name")
+            intent = lead.extra_metadata.get("intent")
+            if not caller_description:
+                caller_description = lead.extra_metadata.get("caller_description")
+
+        # Fallback: if caller_name is still missing, read it from the last
+        # CALLER_NAME_CAPTURED event for this call so CRM always sees the name
+        if not caller_name:
+            q = db.query(CallEvent).filter(CallEvent.event_type == "CALLER_NAME_CAPTURED")
+            if call_id:
+                q = q.filter(CallEvent.call_id == call_id)
+            q = q.order_by(CallEvent.created_at.desc())
             ev = q.first()
             if ev and isinstance(ev.event_payload, dict):
                 caller_name = ev.event_payload.get("name") or caller_name
-        finally:
-            db2.close()
 
     try:
         crm_lead_id = create_lead_in_crm(
@@ -1026,7 +1047,7 @@ def _sync_crm_lead_for_call(call_sid: str, from_number: str | None, override_des
     except Exception as e:
         log_event(call_sid, "CRM_LEAD_ERROR", {"error": str(e)})
 
-def _connect_to_default_agent(call_sid: str, from_number: str | None) -> Response:
+async def _connect_to_default_agent(call_sid: str, from_number: str | None) -> Response:
     """Connect to default agent when no specific category/intent is selected.
     
     Other than persisting to Postgres, this path does NOT create a CRM lead.
@@ -1037,7 +1058,7 @@ def _connect_to_default_agent(call_sid: str, from_number: str | None) -> Respons
     conn_text = _get_prompt("connecting")
     log_event(call_sid, "IVR_SAY", {"prompt": "connecting", "message": conn_text})
     response.say(conn_text, voice=VOICE_NAME, language=LANGUAGE_CODE)
-    _append_dial_instruction(response, call_sid, None, None, from_number)
+    await asyncio.to_thread(_append_dial_instruction, response, call_sid, None, None, from_number)
     return Response(content=str(response), media_type="application/xml")
 
 
@@ -1064,7 +1085,7 @@ def _append_dial_instruction(
         return
 
     # Filter to verified numbers if configured
-    verified = getattr(settings, "VERIFIED_OUTBOUND_NUMBERS", [])
+    verified = _CONFIGURED_VERIFIED
     if not verified:
         verified = get_verified_numbers()
 
@@ -1085,7 +1106,7 @@ def _append_dial_instruction(
     response.say(_get_prompt("connecting"), voice=VOICE_NAME, language=LANGUAGE_CODE)
 
     # Choose caller ID
-    caller_id = _get_caller_id(candidates, incoming_number)
+    caller_id = _get_caller_id(candidates, incoming_number, call_sid)
     log_event(call_sid, "DIAL_ATTEMPT", {"candidates": candidates, "timeout": 20, "caller_id": caller_id})
     try:
         event_logger.info(f"ROUTING_BEGIN: call_sid={call_sid} candidates={candidates} caller_id={caller_id}")
@@ -1113,6 +1134,22 @@ async def voice_dial_complete(request: Request) -> Response:
     dial_status = form.get("DialCallStatus")
     dial_duration = form.get("DialCallDuration")
 
+    to_number, agent_info = await asyncio.to_thread(_lookup_dialed_agent, call_sid, dial_call_sid)
+
+    log_event(call_sid, "DIAL_COMPLETED", {
+        "dial_call_sid": dial_call_sid,
+        "status": dial_status,
+        "duration": dial_duration,
+        "to": to_number,
+        "agent": agent_info,
+    })
+
+    # No further IVR action — this is just a logging callback
+    return Response(content=str(VoiceResponse()), media_type="application/xml")
+
+
+def _lookup_dialed_agent(call_sid: str | None, dial_call_sid: str | None) -> tuple[str | None, dict | None]:
+    """Return the number Twilio dialed for `dial_call_sid` and the agent it belongs to."""
     to_number = None
     try:
         if dial_call_sid:
@@ -1154,51 +1191,50 @@ async def voice_dial_complete(request: Request) -> Response:
         except Exception as exc:
             log_event(call_sid, "AGENT_LOOKUP_ERROR", {"error": str(exc), "phone_number": to_number})
 
-    log_event(call_sid, "DIAL_COMPLETED", {
-        "dial_call_sid": dial_call_sid,
-        "status": dial_status,
-        "duration": dial_duration,
-        "to": to_number,
-        "agent": agent_info,
-    })
+    return to_number, agent_info
 
-    # No further IVR action — this is just a logging callback
-    return Response(content=str(VoiceResponse()), media_type="application/xml")
 
+def _get_caller_id(candidates: list[str], incoming_number: str | None, call_sid: str | None = None) -> str | None:
+    """Determine the best caller ID to use for outbound dialing.
 
-def _get_caller_id(candidates: list[str], incoming_number: str | None) -> str | None:
-    """Determine the best caller ID to use for outbound dialing."""
+    Verified numbers are pre-grouped by country prefix; the pool matching the
+    first candidate is indexed by a stable hash of `call_sid`, so each call is
+    pinned to one caller ID without scanning the whole verified list.
+    """
     try:
-        available_verified = getattr(settings, "VERIFIED_OUTBOUND_NUMBERS", []) or get_verified_numbers()
+        available_verified = _CONFIGURED_VERIFIED
+        if available_verified:
+            pools = _CONFIGURED_CALLER_ID_POOLS
+        else:
+            available_verified = get_verified_numbers()
+            pools = get_verified_numbers_by_prefix()
     except Exception:
-        available_verified = []
+        available_verified, pools = frozenset(), {}
 
-    # Exclude the incoming caller's number
-    if incoming_number and available_verified:
-        available_verified = [v for v in available_verified if v != incoming_number]
+    if not available_verified:
+        return None
 
-    # Exclude candidates (don't dial same number as caller ID)
-    if available_verified:
-        available_verified = [v for v in available_verified if v not in candidates]
+    # Never use the incoming caller's number or a dialed candidate as caller ID
+    excluded = set(candidates)
+    if incoming_number:
+        excluded.add(incoming_number)
 
     # Prefer explicit TWILIO_CALLER_ID
     preferred = getattr(settings, "TWILIO_CALLER_ID", None)
-    if preferred and available_verified and preferred in available_verified and preferred not in candidates:
+    if preferred and preferred in available_verified and preferred not in excluded:
         return preferred
 
-    # Use first available verified number matching candidate country
-    if available_verified and candidates:
-        def _country_prefix(num: str) -> str:
-            if not num or not num.startswith("+"):
-                return ""
-            if num.startswith("+91"):
-                return "+91"
-            if num.startswith("+1"):
-                return "+1"
-            return num[:3]
-
-        cand_pref = _country_prefix(candidates[0])
-        match = next((v for v in available_verified if _country_prefix(v) == cand_pref), None)
-        return match or available_verified[0]
+    if not candidates:
+        return None
 
-    return None
+    # Pick a verified number matching the candidate country, pinned by CallSid
+    pool = pools.get(country_prefix(candidates[0]), ())
+    if pool:
+        start = zlib.crc32(call_sid.encode()) % len(pool) if call_sid else 0
+        for offset in range(len(pool)):
+            num = pool[(start + offset) % len(pool)]
+            if num not in excluded:
+                return num
+
+    # Otherwise any verified number, in sorted order so the choice is stable
+    return next((v for prefix in sorted(pools) for v in pools[prefix] if v not in excluded), None)
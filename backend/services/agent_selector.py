@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Optional, Tuple
 
-from sqlalchemy import desc
+from sqlalchemy import desc, literal, select, union_all
 
 from backend.config import get_settings
 from backend.db import SessionLocal
@@ -61,32 +61,46 @@ def pick_agent(category: Optional[str], currency: Optional[str]) -> Tuple[Option
     normalized_category = _normalized_category(category)
     region = _region_from_currency(currency)
 
+    # Specialists (priority 0) and the regional default (priority 1) are ranked
+    # in one UNION ALL so a cold specialist lookup doesn't cost a second query.
+    specialists = (
+        select(
+            Agent.id.label("agent_id"),
+            literal(0).label("priority"),
+            AgentSpecialization.proficiency_level.label("proficiency"),
+            Agent.is_default.label("is_default"),
+        )
+        .join(AgentSpecialization, AgentSpecialization.agent_id == Agent.id)
+        .where(AgentSpecialization.category == normalized_category)
+        .where(Agent.is_active.is_(True))
+        .where(Agent.region.in_([region, "GLOBAL"]))
+    )
+    defaults = (
+        select(
+            Agent.id.label("agent_id"),
+            literal(1).label("priority"),
+            literal(0).label("proficiency"),
+            Agent.is_default.label("is_default"),
+        )
+        .where(Agent.region == region)
+        .where(Agent.is_active.is_(True))
+        .where(Agent.is_default.is_(True))
+    )
+    ranked = union_all(specialists, defaults).subquery()
+    best_id = (
+        select(ranked.c.agent_id)
+        .order_by(ranked.c.priority, desc(ranked.c.proficiency), desc(ranked.c.is_default))
+        .limit(1)
+        .scalar_subquery()
+    )
+
     db = SessionLocal()
     try:
         try:
-            query = (
-                db.query(Agent, AgentSpecialization)
-                .join(AgentSpecialization, AgentSpecialization.agent_id == Agent.id)
-                .filter(AgentSpecialization.category == normalized_category)
-                .filter(Agent.is_active.is_(True))
-                .filter(Agent.region.in_([region, "GLOBAL"]))
-                .order_by(desc(AgentSpecialization.proficiency_level), desc(Agent.is_default))
-            )
-            result = query.first()
-            if result:
-                agent, _ = result
+            agent = db.query(Agent).filter(Agent.id == best_id).one_or_none()
+            if agent:
                 return agent, agent.phone_number
 
-            default_agent = (
-                db.query(Agent)
-                .filter(Agent.region == region)
-                .filter(Agent.is_active.is_(True))
-                .filter(Agent.is_default.is_(True))
-                .first()
-            )
-            if default_agent:
-                return default_agent, default_agent.phone_number
-
             # No agent found in DB — do not fall back to environment-configured pools.
             log_event(None, "NO_AGENT_CONFIGURED", {"category": normalized_category, "region": region})
             return None, ""
@@ -1,27 +1,98 @@
 """Helpers for creating and updating Call records from Twilio data."""
 
+from collections import OrderedDict
 from datetime import datetime
-from typing import Mapping, Optional
+from typing import Dict, Iterable, Mapping, Optional
+import threading
+import time
+import uuid
+
+from sqlalchemy.orm import Session
 
 from backend.db import SessionLocal
 from backend.models.db_models import Call
 
 
-def ensure_call_from_twilio(form: Mapping[str, str]) -> Optional[Call]:
+# twilio_call_sid -> Call.id; a call's id never changes once the row exists
+CALL_ID_CACHE_SIZE = 10_000
+CALL_ID_CACHE_TTL = 3600  # seconds
+_call_ids: "OrderedDict[str, tuple[uuid.UUID, float]]" = OrderedDict()
+_call_ids_lock = threading.Lock()
+
+
+def cache_call_id(call_sid: str, call_id: uuid.UUID) -> None:
+    """Remember the Call id for a Twilio CallSid."""
+    with _call_ids_lock:
+        _call_ids[call_sid] = (call_id, time.monotonic() + CALL_ID_CACHE_TTL)
+        _call_ids.move_to_end(call_sid)
+        if len(_call_ids) > CALL_ID_CACHE_SIZE:
+            _call_ids.popitem(last=False)
+
+
+def cached_call_id(call_sid: str) -> Optional[uuid.UUID]:
+    """Return the cached Call id for a CallSid, if present and not expired."""
+    with _call_ids_lock:
+        entry = _call_ids.get(call_sid)
+        if entry is None:
+            return None
+        call_id, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del _call_ids[call_sid]
+            return None
+        return call_id
+
+
+def resolve_call_ids(db: Session, call_sids: Iterable[str]) -> Dict[str, uuid.UUID]:
+    """Map CallSids to Call ids, querying only the ones not already cached.
+
+    CallSids without a Call row are left out (and not cached, since the row
+    may be created later).
+    """
+    resolved = {}
+    missing = set()
+    for call_sid in call_sids:
+        if not call_sid:
+            continue
+        call_id = cached_call_id(call_sid)
+        if call_id is None:
+            missing.add(call_sid)
+        else:
+            resolved[call_sid] = call_id
+    if missing:
+        for call_sid, call_id in db.query(Call.twilio_call_sid, Call.id).filter(Call.twilio_call_sid.in_(missing)):
+            cache_call_id(call_sid, call_id)
+            resolved[call_sid] = call_id
+    return resolved
+
+
+def resolve_call_id(db: Session, call_sid: Optional[str]) -> Optional[uuid.UUID]:
+    """Return the Call id for a CallSid, or None if no Call row exists yet."""
+    if not call_sid:
+        return None
+    return resolve_call_ids(db, (call_sid,)).get(call_sid)
+
+
+def ensure_call_from_twilio(form: Mapping[str, str]) -> Optional[uuid.UUID]:
     """Ensure a Call row exists for this Twilio webhook.
 
     Uses Twilio form fields like CallSid, From, To, CallerCountry, etc.
-    Returns the Call instance or None if CallSid is missing.
+    Returns the Call id or None if CallSid is missing. Calls already seen by
+    this process are answered from the id cache without touching the DB.
     """
     call_sid = form.get("CallSid")
     if not call_sid:
         return None
 
+    call_id = cached_call_id(call_sid)
+    if call_id is not None:
+        return call_id
+
     db = SessionLocal()
     try:
-        call = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-        if call:
-            return call
+        call_id = db.query(Call.id).filter_by(twilio_call_sid=call_sid).scalar()
+        if call_id is not None:
+            cache_call_id(call_sid, call_id)
+            return call_id
 
         call = Call(
             twilio_call_sid=call_sid,
@@ -34,8 +105,10 @@ def ensure_call_from_twilio(form: Mapping[str, str]) -> Optional[Call]:
             call_status=form.get("CallStatus"),
         )
         db.add(call)
+        db.flush()
+        call_id = call.id
         db.commit()
-        db.refresh(call)
-        return call
+        cache_call_id(call_sid, call_id)
+        return call_id
     finally:
         db.close()
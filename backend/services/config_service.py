@@ -1,139 +1,407 @@
 """Service for managing cached greetings, agents, and corrections."""
 
-from datetime import datetime, timedelta
-from typing import Optional
-
-from backend.db import SessionLocal
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, Optional
+import itertools
+import re
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend.db import engine
 from backend.models.db_models import Agent, AgentSpecialization, MisheardCorrection, VoiceGreeting, VoicePrompt
 from backend.services.default_prompts import DEFAULT_GREETINGS, DEFAULT_IVR_PROMPTS
-from backend.services.logger import log_event
+from backend.services.logger import log_event_async
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
 
 
 # Cache configuration
 _cache = {
     "greetings": {},
+    "greetings_merged": MappingProxyType(dict(DEFAULT_GREETINGS)),
     "ivr_prompts": {},
+    "ivr_prompts_merged": MappingProxyType(dict(DEFAULT_IVR_PROMPTS)),
     "agents": [],
     "specializations": {},
+    "agents_by_region_category": {},
+    "default_agent_by_region": {},
+    "any_agent_by_region": {},
+    "any_agent": None,
+    "regions_with_agents": frozenset(),
     "corrections": {},
-    "last_refresh": None,
+    "corrections_matcher": (None, ()),  # (matcher, replacements), swapped as one value
+    "corrections_prefixes": None,
+    "last_refresh": None,  # wall-clock time of last load, for display only
+    "generation": 0,  # ticket of the load currently swapped in
+    "refresh_deadline": 0.0,  # time.monotonic() after which the cache is stale
+    "hard_stale_deadline": 0.0,  # time.monotonic() after which we reload inline
 }
 CACHE_TTL_SECONDS = 300  # 5 minutes
+HARD_STALE_SECONDS = CACHE_TTL_SECONDS * 10  # past this, reload synchronously
+
+# Bound once so the getters' freshness check skips the `time` attribute lookup
+_mono = time.monotonic
+
+# Single background worker for stale-while-revalidate refreshes
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="config-refresh")
+_refresh_lock = threading.Lock()
+_refresh_inflight = False
+
+# Each load takes a ticket before reading the DB; a load that finishes after a
+# newer one was swapped in (e.g. a background reload overtaken by a forced
+# refresh) is discarded instead of overwriting fresher data
+_load_tickets = itertools.count(1)
+_swap_lock = threading.Lock()
 
 
 def _is_cache_stale() -> bool:
     """Check if cache needs refresh."""
-    if _cache["last_refresh"] is None:
-        return True
-    return datetime.utcnow() - _cache["last_refresh"] > timedelta(seconds=CACHE_TTL_SECONDS)
+    return _mono() >= _cache["refresh_deadline"]
 
 
-def refresh_cache(force: bool = False) -> None:
-    """Refresh all cached data from DB."""
-    if not force and not _is_cache_stale():
-        return
-    
-    db = SessionLocal()
+def _is_cache_hard_stale() -> bool:
+    """Check if cache is too old to keep serving while a refresh runs."""
+    return _mono() >= _cache["hard_stale_deadline"]
+
+
+def _load_cache() -> None:
+    """Load all cached data from DB and swap it into the cache in one update."""
+    generation = next(_load_tickets)
     try:
-        # Load greetings
-        greetings = db.query(VoiceGreeting).all()
-        _cache["greetings"] = {g.language: g.message for g in greetings}
-
-        # Load IVR prompts
-        prompts = db.query(VoicePrompt).all()
-        _cache["ivr_prompts"] = {p.key: p.message for p in prompts}
-        
-        # Load agents
-        agents = db.query(Agent).filter(Agent.is_active == True).all()
-        _cache["agents"] = [
-            {
-                "id": a.id,
-                "name": a.name,
-                "phone_number": a.phone_number,
-                "region": a.region,
-                "is_default": a.is_default,
+        # Plain Core selects of just the needed columns: no ORM identity map
+        # or attribute instrumentation, and one pooled connection for all reads.
+        with engine.connect() as conn:
+            # Load greetings
+            greetings_map = {
+                row.language: row.message
+                for row in conn.execute(select(VoiceGreeting.language, VoiceGreeting.message))
+            }
+
+            # Load IVR prompts
+            prompts_map = {
+                row.key: row.message
+                for row in conn.execute(select(VoicePrompt.key, VoicePrompt.message))
+            }
+
+            # Load agents
+            agent_list = [
+                dict(row)
+                for row in conn.execute(
+                    select(Agent.id, Agent.name, Agent.phone_number, Agent.region, Agent.is_default)
+                    .where(Agent.is_active == True)
+                ).mappings()
+            ]
+
+            # Load specializations (grouped by agent_id)
+            spec_map = {}
+            for row in conn.execute(
+                select(AgentSpecialization.agent_id, AgentSpecialization.category, AgentSpecialization.proficiency_level)
+            ):
+                spec_map.setdefault(row.agent_id, []).append({
+                    "category": row.category,
+                    "proficiency": row.proficiency_level,
+                })
+
+            # Load misheard corrections
+            corrections_map = {
+                row.wrong_word.lower(): row.correct_word.lower()
+                for row in conn.execute(
+                    select(MisheardCorrection.wrong_word, MisheardCorrection.correct_word)
+                    .where(MisheardCorrection.is_active == True)
+                )
             }
-            for a in agents
-        ]
-        
-        # Load specializations (grouped by agent_id)
-        specs = db.query(AgentSpecialization).all()
-        spec_map = {}
-        for s in specs:
-            if s.agent_id not in spec_map:
-                spec_map[s.agent_id] = []
-            spec_map[s.agent_id].append({
-                "category": s.category,
-                "proficiency": s.proficiency_level,
-            })
-        _cache["specializations"] = spec_map
-        
-        # Load misheard corrections
-        corrections = db.query(MisheardCorrection).filter(MisheardCorrection.is_active == True).all()
-        _cache["corrections"] = {c.wrong_word.lower(): c.correct_word.lower() for c in corrections}
-        
-        _cache["last_refresh"] = datetime.utcnow()
-        log_event(None, "CONFIG_CACHE_REFRESHED", {
-            "greetings": len(_cache["greetings"]),
-            "agents": len(_cache["agents"]),
-            "corrections": len(_cache["corrections"]),
+
+        matcher, replacements = _build_corrections_matcher(corrections_map)
+
+        loaded_at = time.monotonic()
+        snapshot = {
+            "greetings": greetings_map,
+            "greetings_merged": MappingProxyType({**DEFAULT_GREETINGS, **greetings_map}),
+            "ivr_prompts": prompts_map,
+            # Defaults merged with overrides so the admin UI always sees all keys
+            "ivr_prompts_merged": MappingProxyType({**DEFAULT_IVR_PROMPTS, **prompts_map}),
+            "agents": agent_list,
+            "specializations": spec_map,
+            **_build_agent_indexes(agent_list, spec_map),
+            "corrections": corrections_map,
+            "corrections_matcher": (matcher, replacements),
+            "corrections_prefixes": _build_corrections_prefixes(corrections_map),
+            "last_refresh": datetime.utcnow(),
+            "refresh_deadline": loaded_at + CACHE_TTL_SECONDS,
+            "hard_stale_deadline": loaded_at + HARD_STALE_SECONDS,
+            "generation": generation,
+        }
+        with _swap_lock:
+            if generation < _cache["generation"]:
+                return
+            # update() swaps keys one by one, so a concurrent reader can see old
+            # and new values side by side; values that must agree share a key
+            _cache.update(snapshot)
+        log_event_async(None, "CONFIG_CACHE_REFRESHED", {
+            "greetings": len(greetings_map),
+            "agents": len(agent_list),
+            "corrections": len(corrections_map),
         })
     except Exception as e:
-        log_event(None, "CONFIG_CACHE_ERROR", {"error": str(e)})
+        log_event_async(None, "CONFIG_CACHE_ERROR", {"error": str(e)})
+
+
+def _build_agent_indexes(agents: list[dict], spec_map: dict) -> dict:
+    """Precompute the lookups used by `get_agent_for_category_and_region`.
+
+    Each agent dict is merged with its specializations once, then indexed by
+    (region, category) sorted by proficiency, plus per-region default and
+    first-seen agents, so routing is a handful of dict lookups.
+    """
+    by_region_category = defaultdict(list)
+    default_by_region: dict[str, dict] = {}
+    any_by_region: dict[str, dict] = {}
+    agents_with_specs = []
+
+    for agent in agents:
+        agent_specs = spec_map.get(agent["id"], [])
+        merged = {
+            **agent,
+            "specializations": agent_specs,
+            "categories": [s["category"] for s in agent_specs],
+        }
+        agents_with_specs.append(merged)
+
+        region = agent["region"]
+        any_by_region.setdefault(region, merged)
+        if agent["is_default"]:
+            default_by_region.setdefault(region, merged)
+
+        best_by_category: dict[str, int] = {}
+        for spec in agent_specs:
+            proficiency = spec["proficiency"] or 0
+            if proficiency > best_by_category.get(spec["category"], -1):
+                best_by_category[spec["category"]] = proficiency
+        for category, proficiency in best_by_category.items():
+            by_region_category[(region, category)].append((proficiency, merged))
+
+    # Stable sort: ties keep load order, as max() over the list used to
+    return {
+        "agents_by_region_category": {
+            key: [a for _, a in sorted(ranked, key=lambda item: item[0], reverse=True)]
+            for key, ranked in by_region_category.items()
+        },
+        "default_agent_by_region": default_by_region,
+        "any_agent_by_region": any_by_region,
+        "any_agent": agents_with_specs[0] if agents_with_specs else None,
+        "regions_with_agents": frozenset(any_by_region),
+    }
+
+
+def _background_refresh() -> None:
+    """Reload the cache off the request path and clear the in-flight flag."""
+    global _refresh_inflight
+    try:
+        _load_cache()
     finally:
-        db.close()
+        with _refresh_lock:
+            _refresh_inflight = False
+
+
+def refresh_cache(force: bool = False) -> None:
+    """Refresh all cached data from DB.
+
+    A stale cache keeps being served while a single background reload runs
+    (stale-while-revalidate). The DB is only hit on the caller's thread when
+    forced, on cold start, or once the cache is past HARD_STALE_SECONDS.
+    """
+    global _refresh_inflight
+    if force or _is_cache_hard_stale():
+        _load_cache()
+        return
+    if not _is_cache_stale():
+        return
+
+    with _refresh_lock:
+        if _refresh_inflight:
+            return
+        _refresh_inflight = True
+    try:
+        _refresh_executor.submit(_background_refresh)
+    except RuntimeError:
+        # Executor already shut down (interpreter exit); reload inline instead
+        _background_refresh()
 
 
 def get_voice_greeting(language_code: str) -> str:
     """Return the IVR greeting for a language, falling back to defaults."""
-    refresh_cache()
-    greetings = _cache["greetings"]
-    if language_code in greetings:
-        return greetings[language_code]
-    return DEFAULT_GREETINGS.get(language_code, DEFAULT_GREETINGS["en-IN"])
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
+    return _cache["greetings_merged"].get(language_code, DEFAULT_GREETINGS["en-IN"])
 
 
 def get_all_voice_greetings() -> dict[str, str]:
     """Return all configured greetings keyed by language."""
-    refresh_cache()
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
     return _cache["greetings"]
 
 
 def get_ivr_prompt(key: str) -> str:
     """Return the IVR prompt text for a given key, falling back to defaults."""
-    refresh_cache()
-    prompts = _cache["ivr_prompts"]
-    if key in prompts:
-        return prompts[key]
-    return DEFAULT_IVR_PROMPTS.get(key, "")
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
+    return _cache["ivr_prompts_merged"].get(key, "")
+
 
+def get_all_ivr_prompts() -> Mapping[str, str]:
+    """Return all IVR prompts (defaults plus overrides) keyed by prompt key.
 
-def get_all_ivr_prompts() -> dict[str, str]:
-    """Return all configured IVR prompts keyed by prompt key."""
-    refresh_cache()
-    # Merge defaults with overrides so admin UI always sees all keys
-    merged = {**DEFAULT_IVR_PROMPTS}
-    merged.update(_cache["ivr_prompts"])
-    return merged
+    The mapping is built once per cache refresh and is read-only.
+    """
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
+    return _cache["ivr_prompts_merged"]
 
 
 def get_misheard_corrections() -> dict[str, str]:
     """Get all misheard word corrections."""
-    refresh_cache()
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
     return _cache["corrections"]
 
 
+def _build_corrections_matcher(corrections: dict[str, str]):
+    """Compile corrections into a single-pass matcher.
+
+    Returns ``(matcher, replacements)``. Prefers a Hyperscan database when the
+    library is installed (``replacements`` maps pattern id to the encoded
+    correction), then an Aho-Corasick automaton, then one regex alternation
+    with longer keys first. All resolve overlapping keys by taking the
+    leftmost, longest match.
+    """
+    keys = [wrong for wrong in corrections if wrong]
+    if not keys:
+        return None, ()
+    if HYPERSCAN_AVAILABLE:
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[re.escape(wrong).encode() for wrong in keys],
+                ids=list(range(len(keys))),
+                elements=len(keys),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(keys),
+            )
+            return database, tuple(corrections[wrong].encode() for wrong in keys)
+        except hyperscan.error as e:
+            log_event_async(None, "CORRECTIONS_HYPERSCAN_ERROR", {"error": str(e)})
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for wrong in keys:
+            automaton.add_word(wrong, (len(wrong), corrections[wrong]))
+        automaton.make_automaton()
+        return automaton, ()
+    return re.compile("|".join(sorted(map(re.escape, keys), key=len, reverse=True)), re.IGNORECASE), ()
+
+
+_hyperscan_local = threading.local()
+
+
+def _hyperscan_apply(database, replacements: tuple[bytes, ...], text: str) -> str:
+    """Rewrite text using a Hyperscan database of correction patterns.
+
+    Hyperscan reports every match, so overlaps are resolved here: matches are
+    taken left to right, longest first, skipping any that overlap a match
+    already kept. Scratch space is per thread since scans may run concurrently.
+    """
+    scratch = getattr(_hyperscan_local, "scratch", None)
+    if scratch is None or _hyperscan_local.database is not database:
+        scratch = hyperscan.Scratch(database)
+        _hyperscan_local.scratch = scratch
+        _hyperscan_local.database = database
+
+    matches = []
+
+    def on_match(pattern_id, start, end, flags, context):
+        matches.append((start, -end, pattern_id))
+
+    data = text.encode()
+    database.scan(data, match_event_handler=on_match, scratch=scratch)
+    if not matches:
+        return text
+
+    out = bytearray()
+    pos = 0
+    for start, neg_end, pattern_id in sorted(matches):
+        if start < pos:
+            continue
+        out += data[pos:start]
+        out += replacements[pattern_id]
+        pos = -neg_end
+    out += data[pos:]
+    return out.decode()
+
+
+def _build_corrections_prefixes(corrections: dict[str, str]) -> Optional[frozenset[str]]:
+    """Return the 3-char prefixes of all correction keys for a cheap pre-screen.
+
+    Returns None when a key is shorter than three characters, since such a key
+    could match without any prefix being present.
+    """
+    keys = [wrong for wrong in corrections if wrong]
+    if any(len(wrong) < 3 for wrong in keys):
+        return None
+    return frozenset(wrong[:3] for wrong in keys)
+
+
 def correct_misheard_words(text: str) -> str:
-    """Apply misheard word corrections to text."""
+    """Apply misheard word corrections to text.
+
+    Matching is case-insensitive; only matched spans are replaced, so the rest
+    of the caller's text keeps its casing and unmatched text is returned as is.
+    """
     corrections = get_misheard_corrections()
-    if not corrections:
+    matcher, replacements = _cache["corrections_matcher"]
+    if not corrections or matcher is None:
         return text
 
-    result = text.lower()
-    for wrong, correct in corrections.items():
-        if wrong in result:
-            result = result.replace(wrong, correct)
-    return result
+    # Correction keys are lowercase, so every matcher's hits start with one of
+    # their prefixes in a lowercased copy. Most utterances contain no
+    # correctable word; skip the matcher, whichever backend it is, for them
+    lowered = text.lower()
+    prefixes = _cache["corrections_prefixes"]
+    if prefixes is not None and not any(prefix in lowered for prefix in prefixes):
+        return text
+
+    if isinstance(matcher, re.Pattern):
+        return matcher.sub(lambda m: corrections.get(m.group(0).lower(), m.group(0)), text)
+    if HYPERSCAN_AVAILABLE and isinstance(matcher, hyperscan.Database):
+        return _hyperscan_apply(matcher, replacements, text)
+
+    # The automaton is case-sensitive, so it scans the lowercased copy.
+    # Offsets only line up with the original when lowercasing kept the length
+    source = text if len(lowered) == len(text) else lowered
+    pieces = []
+    pos = 0
+    for end, (length, correct) in matcher.iter_long(lowered):
+        pieces.append(source[pos:end - length + 1])
+        pieces.append(correct)
+        pos = end + 1
+    if not pieces:
+        return text
+    pieces.append(source[pos:])
+    return "".join(pieces)
 
 
 def get_agent_for_category_and_region(category: Optional[str], region: str) -> Optional[dict]:
@@ -152,161 +420,121 @@ def get_agent_for_category_and_region(category: Optional[str], region: str) -> O
     Returns:
         Agent dict with id, name, phone_number, region, specializations
     """
-    refresh_cache()
-    agents = _cache["agents"]
-    specs = _cache["specializations"]
-    
-    if not agents:
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
+    if _cache["any_agent"] is None:
         return None
-    
-    # Build agent lookup with their specializations
-    agents_with_specs = []
-    for agent in agents:
-        agent_specs = specs.get(agent["id"], [])
-        agents_with_specs.append({
-            **agent,
-            "specializations": agent_specs,
-            "categories": [s["category"] for s in agent_specs],
-        })
-    
-    # If category specified, find specialist
+
+    # Priority 1 and 2: highest-proficiency specialist in region, then GLOBAL
     if category:
-        # Priority 1: Specialist in region
-        regional_specialists = [
-            a for a in agents_with_specs
-            if a["region"] == region and category in a["categories"]
-        ]
-        if regional_specialists:
-            # Return highest proficiency
-            best = max(regional_specialists, key=lambda a: max(
-                (s["proficiency"] for s in a["specializations"] if s["category"] == category),
-                default=0
-            ))
-            return best
-        
-        # Priority 2: Global specialist
-        global_specialists = [
-            a for a in agents_with_specs
-            if a["region"] == "GLOBAL" and category in a["categories"]
-        ]
-        if global_specialists:
-            best = max(global_specialists, key=lambda a: max(
-                (s["proficiency"] for s in a["specializations"] if s["category"] == category),
-                default=0
-            ))
-            return best
-    
-    # Priority 3: Default agent for region
-    defaults = [a for a in agents_with_specs if a["region"] == region and a["is_default"]]
-    if defaults:
-        return defaults[0]
-    
-    # Priority 4: Any agent in region
-    regional = [a for a in agents_with_specs if a["region"] == region]
-    if regional:
-        return regional[0]
-    
-    # Priority 5: Global default
-    global_defaults = [a for a in agents_with_specs if a["region"] == "GLOBAL" and a["is_default"]]
-    if global_defaults:
-        return global_defaults[0]
-    
+        by_region_category = _cache["agents_by_region_category"]
+        specialists = by_region_category.get((region, category)) or by_region_category.get(("GLOBAL", category))
+        if specialists:
+            return specialists[0]
+
+    # Priority 3-5: regional default, any regional agent, global default
+    agent = (
+        _cache["default_agent_by_region"].get(region)
+        or _cache["any_agent_by_region"].get(region)
+        or _cache["default_agent_by_region"].get("GLOBAL")
+    )
+    if agent:
+        return agent
+
     # Last resort: any agent
-    return agents_with_specs[0] if agents_with_specs else None
+    return _cache["any_agent"]
 
 
 def get_agent_phone_for_region(region: str) -> Optional[str]:
     """Get default agent phone number for a region (backward compatible)."""
-    agent = get_agent_for_category_and_region(None, region)
+    if _cache["refresh_deadline"] <= _mono():
+        refresh_cache()
+    if region in _cache["regions_with_agents"]:
+        agent = get_agent_for_category_and_region(None, region)
+    else:
+        # No agents in this region: only the global default or last resort remain
+        agent = _cache["default_agent_by_region"].get("GLOBAL") or _cache["any_agent"]
     return agent["phone_number"] if agent else None
 
 
 # ==================== DB POPULATION HELPERS ====================
 
-def seed_default_corrections() -> None:
-    """Seed default misheard word corrections if DB is empty."""
-    db = SessionLocal()
-    try:
-        existing = db.query(MisheardCorrection).count()
-        if existing > 0:
-            return
-        
-        from backend.services.default_prompts import DEFAULT_CORRECTIONS
-        
-        for wrong, correct in DEFAULT_CORRECTIONS.items():
-            correction = MisheardCorrection(
-                wrong_word=wrong,
-                correct_word=correct,
-                is_active=True,
-            )
-            db.add(correction)
-        
-        db.commit()
-        log_event(None, "CORRECTIONS_SEEDED", {"count": len(DEFAULT_CORRECTIONS)})
-    except Exception as e:
-        log_event(None, "CORRECTIONS_SEED_ERROR", {"error": str(e)})
-        db.rollback()
-    finally:
-        db.close()
+def seed_default_corrections(db: Session) -> int:
+    """Insert default misheard word corrections if the table is empty.
+
+    Runs inside the caller's transaction; returns the number of rows added.
+    """
+    existing = db.query(MisheardCorrection).count()
+    if existing > 0:
+        return 0
 
+    from backend.services.default_prompts import DEFAULT_CORRECTIONS
 
-def seed_default_greetings() -> None:
-    """Seed default voice greetings if DB is empty."""
-    db = SessionLocal()
-    try:
-        existing = db.query(VoiceGreeting).count()
-        if existing > 0:
-            return
+    db.bulk_insert_mappings(MisheardCorrection, [
+        {"wrong_word": wrong, "correct_word": correct, "is_active": True}
+        for wrong, correct in DEFAULT_CORRECTIONS.items()
+    ])
+    return len(DEFAULT_CORRECTIONS)
 
-        for language, message in DEFAULT_GREETINGS.items():
-            greeting = VoiceGreeting(language=language, message=message)
-            db.add(greeting)
 
-        db.commit()
-        log_event(None, "GREETINGS_SEEDED", {"count": len(DEFAULT_GREETINGS)})
-    except Exception as e:
-        log_event(None, "GREETINGS_SEED_ERROR", {"error": str(e)})
-        db.rollback()
-    finally:
-        db.close()
+def seed_default_greetings(db: Session) -> int:
+    """Insert default voice greetings if the table is empty.
 
+    Runs inside the caller's transaction; returns the number of rows added.
+    """
+    existing = db.query(VoiceGreeting).count()
+    if existing > 0:
+        return 0
 
-def seed_default_ivr_prompts() -> None:
-    """Seed default IVR prompts if DB is empty."""
-    db = SessionLocal()
-    try:
-        existing = db.query(VoicePrompt).count()
-        if existing > 0:
-            return
+    db.bulk_insert_mappings(VoiceGreeting, [
+        {"language": language, "message": message}
+        for language, message in DEFAULT_GREETINGS.items()
+    ])
+    return len(DEFAULT_GREETINGS)
 
-        for key, message in DEFAULT_IVR_PROMPTS.items():
-            prompt = VoicePrompt(key=key, message=message)
-            db.add(prompt)
 
-        db.commit()
-        log_event(None, "IVR_PROMPTS_SEEDED", {"count": len(DEFAULT_IVR_PROMPTS)})
-    except Exception as e:
-        log_event(None, "IVR_PROMPTS_SEED_ERROR", {"error": str(e)})
-        db.rollback()
-    finally:
-        db.close()
+def seed_default_ivr_prompts(db: Session) -> int:
+    """Insert default IVR prompts if the table is empty.
+
+    Runs inside the caller's transaction; returns the number of rows added.
+    """
+    existing = db.query(VoicePrompt).count()
+    if existing > 0:
+        return 0
+
+    db.bulk_insert_mappings(VoicePrompt, [
+        {"key": key, "message": message}
+        for key, message in DEFAULT_IVR_PROMPTS.items()
+    ])
+    return len(DEFAULT_IVR_PROMPTS)
 
 
-def seed_default_agents() -> None:
+def seed_default_agents(db: Session) -> None:
     """Seed default agents if DB is empty."""
-    db = SessionLocal()
-    try:
-        existing = db.query(Agent).count()
-        if existing > 0:
-            return
-        # Do NOT seed placeholder agents from environment variables.
-        # Operators must configure agents in the database explicitly.
-        log_event(None, "NO_AGENTS_CONFIGURED_IN_DB", {"message": "No agents found in DB. Please configure agents in the database."})
-    except Exception as e:
-        log_event(None, "AGENTS_SEED_ERROR", {"error": str(e)})
-        db.rollback()
-    finally:
-        db.close()
+    existing = db.query(Agent).count()
+    if existing > 0:
+        return
+    # Do NOT seed placeholder agents from environment variables.
+    # Operators must configure agents in the database explicitly.
+    log_event_async(None, "NO_AGENTS_CONFIGURED_IN_DB", {"message": "No agents found in DB. Please configure agents in the database."})
+
+
+SeedStatus = namedtuple("SeedStatus", ["corrections", "greetings", "ivr_prompts", "agents"])
+
+
+def _seed_needed() -> SeedStatus:
+    """Report which config tables are empty, using one aggregated COUNT query."""
+    def count(model):
+        return select(func.count()).select_from(model).scalar_subquery()
+
+    with engine.connect() as conn:
+        row = conn.execute(select(
+            count(MisheardCorrection),
+            count(VoiceGreeting),
+            count(VoicePrompt),
+            count(Agent),
+        )).one()
+    return SeedStatus(*(n == 0 for n in row))
 
 
 def initialize_config() -> None:
@@ -319,18 +547,36 @@ def initialize_config() -> None:
 
     db = SessionLocal()
     try:
-        cutoff = datetime.utcnow() - timedelta(seconds=60)
-        exists = db.query(CallEvent).filter(CallEvent.event_type == "CONFIG_CACHE_REFRESHED", CallEvent.created_at >= cutoff).first()
-        if exists:
-            return
-    except Exception:
-        # If DB check fails, proceed with initialization to avoid missing seeds.
-        pass
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=60)
+            exists = db.query(CallEvent).filter(CallEvent.event_type == "CONFIG_CACHE_REFRESHED", CallEvent.created_at >= cutoff).first()
+            if exists:
+                return
+        except Exception:
+            # If DB check fails, proceed with initialization to avoid missing seeds.
+            db.rollback()
+
+        # Only run the seeders whose table is empty; they share one transaction
+        try:
+            needed = _seed_needed()
+            seeded = {}
+            if needed.corrections:
+                seeded["CORRECTIONS_SEEDED"] = seed_default_corrections(db)
+            if needed.greetings:
+                seeded["GREETINGS_SEEDED"] = seed_default_greetings(db)
+            if needed.ivr_prompts:
+                seeded["IVR_PROMPTS_SEEDED"] = seed_default_ivr_prompts(db)
+            if needed.agents:
+                seed_default_agents(db)
+            if seeded:
+                db.commit()
+            for event_type, count in seeded.items():
+                if count:
+                    log_event_async(None, event_type, {"count": count})
+        except Exception as e:
+            log_event_async(None, "CONFIG_SEED_ERROR", {"error": str(e)})
+            db.rollback()
     finally:
         db.close()
 
-    seed_default_corrections()
-    seed_default_agents()
-    seed_default_greetings()
-    seed_default_ivr_prompts()
     refresh_cache(force=True)
@@ -3,88 +3,197 @@
 Converts caller data from IVR flow into Salesforce Lead records.
 """
 import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from types import MappingProxyType
 from typing import Optional, Dict, Any
 from urllib.parse import urlencode
+from urllib3.util.retry import Retry
 
-from backend.services.logger import log_event
+from backend.services.logger import log_event_async
 
 
-# CRM Configuration - loaded from environment
-CRM_TOKEN_URL = os.getenv("CRM_TOKEN_URL", "")
-CRM_BASE_URL = os.getenv("CRM_BASE_URL", "")
-CRM_CLIENT_ID = os.getenv("CRM_CLIENT_ID", "")
-CRM_CLIENT_SECRET = os.getenv("CRM_CLIENT_SECRET", "")
-CRM_USERNAME = os.getenv("CRM_USERNAME", "")
-CRM_PASSWORD = os.getenv("CRM_PASSWORD", "")
+@dataclass(frozen=True)
+class CrmConfig:
+    """Salesforce connection settings read from the environment."""
+    token_url: str
+    base_url: str
+    client_id: str
+    client_secret: str = field(repr=False)
+    username: str
+    password: str = field(repr=False)
+    configured: bool = field(init=False)
 
-# Cached token
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "configured",
+            bool(self.token_url and self.base_url and self.client_id and self.client_secret),
+        )
+
+
+@lru_cache(maxsize=1)
+def _crm_config() -> CrmConfig:
+    """Read CRM configuration from the environment once."""
+    return CrmConfig(
+        token_url=os.getenv("CRM_TOKEN_URL", ""),
+        base_url=os.getenv("CRM_BASE_URL", ""),
+        client_id=os.getenv("CRM_CLIENT_ID", ""),
+        client_secret=os.getenv("CRM_CLIENT_SECRET", ""),
+        username=os.getenv("CRM_USERNAME", ""),
+        password=os.getenv("CRM_PASSWORD", ""),
+    )
+
+# Lead title per IVR intent; every known intent is also flagged as a hot lead
+_TITLE_MAP = MappingProxyType({
+    sys.intern(intent): title
+    for intent, title in {
+        "general_inquiry": "Enquiry",
+        "store": "Try Near You",
+        "price_request": "Price Request",
+        "unknown": "Enquiry",
+    }.items()
+})
+_KNOWN_INTENTS = frozenset(_TITLE_MAP)
+
+# Shared HTTP session so Salesforce calls reuse keep-alive connections.
+# Lead creation is not idempotent, so only connection failures (the request
+# never reached Salesforce) are retried; read timeouts and 5xx are not.
+_http = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=0,
+        backoff_factor=0.2,
+        allowed_methods=frozenset(["POST"]),
+        raise_on_status=False,
+    ),
+)
+_http.mount("https://", _adapter)
+_http.mount("http://", _adapter)
+
+# Cached token; expires_at is a time.monotonic() deadline
 _token_cache: Dict[str, Any] = {"access_token": None, "expires_at": 0}
+_token_lock = threading.Lock()
+TOKEN_DEFAULT_TTL = 1800  # seconds, when the token response has no expires_in
+TOKEN_EXPIRY_MARGIN = 60  # seconds shaved off to avoid using a token as it expires
 
 
 def _is_crm_configured() -> bool:
     """Check if CRM credentials are configured."""
-    return bool(CRM_TOKEN_URL and CRM_BASE_URL and CRM_CLIENT_ID and CRM_CLIENT_SECRET)
+    return _crm_config().configured
+
+
+def reload_crm_config() -> None:
+    """Re-read CRM credentials from the environment (e.g. after rotation)."""
+    _crm_config.cache_clear()
+    with _token_lock:
+        _token_cache["access_token"] = None
+        _token_cache["expires_at"] = 0
+
+
+def _cached_crm_token() -> Optional[str]:
+    """Return the cached access token if it has not expired yet."""
+    if _token_cache["access_token"] and time.monotonic() < _token_cache["expires_at"]:
+        return _token_cache["access_token"]
+    return None
+
+
+def _invalidate_crm_token(stale_token: str) -> None:
+    """Drop the cached token if it is still the one that was rejected."""
+    with _token_lock:
+        if _token_cache["access_token"] == stale_token:
+            _token_cache["expires_at"] = 0
 
 
 def get_crm_token() -> Optional[str]:
     """Get Salesforce OAuth access token using client credentials flow.
+
+    Reuses the cached token until shortly before it expires; concurrent
+    callers share a single re-authentication.
     
     Returns:
         Access token string or None if authentication fails.
     """
     if not _is_crm_configured():
-        log_event(None, "CRM_NOT_CONFIGURED", {"message": "CRM credentials not set in environment"})
+        log_event_async(None, "CRM_NOT_CONFIGURED", {"message": "CRM credentials not set in environment"})
         return None
 
+    cached = _cached_crm_token()
+    if cached:
+        return cached
+
+    with _token_lock:
+        # Another caller may have refreshed the token while we waited
+        cached = _cached_crm_token()
+        if cached:
+            return cached
+        return _request_crm_token()
+
+
+def _request_crm_token() -> Optional[str]:
+    """Request a new access token from Salesforce and cache it."""
+    cfg = _crm_config()
     try:
         # Build token request
         params = {
             "grant_type": "client_credentials",
-            "client_id": CRM_CLIENT_ID,
-            "client_secret": CRM_CLIENT_SECRET,
+            "client_id": cfg.client_id,
+            "client_secret": cfg.client_secret,
         }
         
         # Add username/password if configured (for password grant flow)
-        if CRM_USERNAME and CRM_PASSWORD:
+        if cfg.username and cfg.password:
             params["grant_type"] = "password"
-            params["username"] = CRM_USERNAME
-            params["password"] = CRM_PASSWORD
+            params["username"] = cfg.username
+            params["password"] = cfg.password
 
         headers = {
             "Content-Type": "application/x-www-form-urlencoded"
         }
 
-        response = requests.post(
-            CRM_TOKEN_URL,
+        response = _http.post(
+            cfg.token_url,
             data=urlencode(params),
             headers=headers,
             timeout=30
         )
 
         if response.status_code != 200:
-            log_event(None, "CRM_TOKEN_ERROR", {
+            log_event_async(None, "CRM_TOKEN_ERROR", {
                 "status": response.status_code,
                 "response": response.text[:500]
             })
             return None
 
-        token_data = response.json()
+        token_data = orjson.loads(response.content)
         access_token = token_data.get("access_token")
         
         if access_token:
-            log_event(None, "CRM_TOKEN_SUCCESS", {"token_type": token_data.get("token_type")})
+            log_event_async(None, "CRM_TOKEN_SUCCESS", {"token_type": token_data.get("token_type")})
+            expires_in = int(token_data.get("expires_in") or TOKEN_DEFAULT_TTL)
             _token_cache["access_token"] = access_token
+            _token_cache["expires_at"] = time.monotonic() + expires_in - TOKEN_EXPIRY_MARGIN
             return access_token
         
-        log_event(None, "CRM_TOKEN_MISSING", {"response": token_data})
+        log_event_async(None, "CRM_TOKEN_MISSING", {"response": token_data})
         return None
 
     except requests.RequestException as e:
-        log_event(None, "CRM_TOKEN_REQUEST_FAILED", {"error": str(e)})
+        log_event_async(None, "CRM_TOKEN_REQUEST_FAILED", {"error": str(e)})
         return None
     except Exception as e:
-        log_event(None, "CRM_TOKEN_EXCEPTION", {"error": str(e)})
+        log_event_async(None, "CRM_TOKEN_EXCEPTION", {"error": str(e)})
         return None
 
 
@@ -111,25 +220,20 @@ def create_lead_in_crm(
     Returns:
         Salesforce Lead ID if created successfully, None otherwise.
     """
-    if not _is_crm_configured():
-        log_event(call_sid, "CRM_LEAD_SKIPPED", {"reason": "CRM not configured"})
+    cfg = _crm_config()
+    if not cfg.configured:
+        log_event_async(call_sid, "CRM_LEAD_SKIPPED", {"reason": "CRM not configured"})
         return None
 
     # Get access token
     access_token = get_crm_token()
     if not access_token:
-        log_event(call_sid, "CRM_LEAD_FAILED", {"reason": "Could not get access token"})
+        log_event_async(call_sid, "CRM_LEAD_FAILED", {"reason": "Could not get access token"})
         return None
 
     try:
         # Map intent to title
-        title_map = {
-            "general_inquiry": "Enquiry",
-            "store": "Try Near You",
-            "price_request": "Price Request",
-            "unknown": "Enquiry",
-        }
-        title = title_map.get(intent, "Price Request / Enquiry")
+        title = _TITLE_MAP.get(intent, "Price Request / Enquiry")
 
         # Build lead data
         # Required fields: LastName, Company
@@ -143,37 +247,33 @@ def create_lead_in_crm(
         #   to Notes__c together with other captured context.
 
         # Build notes payload. Always include a Call flag.
-        notes_pieces = ["Call: true"]
-        if category:
-            notes_pieces.append(f"Category: {category}")
-        if product_id:
-            notes_pieces.append(f"Product: {product_id}")
-        if description:
-            notes_pieces.append(str(description))
-        notes_text = "\n\n".join([p for p in notes_pieces if p])
+        notes_text = "\n\n".join(
+            piece
+            for piece in (
+                "Call: true",
+                f"Category: {category}" if category else None,
+                f"Product: {product_id}" if product_id else None,
+                str(description) if description else None,
+            )
+            if piece
+        )
 
+        # Only non-null fields are sent (Salesforce doesn't like explicit nulls
+        # for some fields); Email and the SFCC product field are always omitted.
         lead_body = {
             "LastName": last_name,
             "Company": company,
-            "Email": None,  # Not collected in IVR
-            "MobilePhone": mobile_phone,
+            **({"MobilePhone": mobile_phone} if mobile_phone is not None else {}),
             "Notes__c": notes_text,
             "Title": title,
-            # Always send null/omit this SFCC product field; product name goes into Notes__c.
-            "Product_Interest_SFCC__c": None,
         }
 
         # Set hot lead flags for all known intents (store/general_inquiry/price_request/unknown)
-        if intent in title_map:
+        if intent in _KNOWN_INTENTS:
             lead_body["Rating"] = "Hot"
             lead_body["Lead_Temperature__c"] = "Hot"
 
-        # Notes__c is already built above with Category/Product/Description
-
-        # Remove None values (Salesforce doesn't like explicit nulls for some fields)
-        lead_body = {k: v for k, v in lead_body.items() if v is not None}
-
-        log_event(call_sid, "CRM_LEAD_CREATING", {"body": lead_body})
+        log_event_async(call_sid, "CRM_LEAD_CREATING", {"body": lead_body})
 
         # Make API request
         headers = {
@@ -181,30 +281,45 @@ def create_lead_in_crm(
             "Content-Type": "application/json"
         }
 
-        url = f"{CRM_BASE_URL}/services/data/v62.0/sobjects/Lead"
+        url = f"{cfg.base_url}/services/data/v62.0/sobjects/Lead"
+        body = orjson.dumps(lead_body)
         
-        response = requests.post(
+        response = _http.post(
             url,
-            json=lead_body,
+            data=body,
             headers=headers,
             timeout=30
         )
 
+        # Cached token was revoked or expired early: re-authenticate once and retry
+        if response.status_code == 401:
+            log_event_async(call_sid, "CRM_TOKEN_REJECTED", {"status": response.status_code})
+            _invalidate_crm_token(access_token)
+            access_token = get_crm_token()
+            if access_token:
+                headers["Authorization"] = f"Bearer {access_token}"
+                response = _http.post(
+                    url,
+                    data=body,
+                    headers=headers,
+                    timeout=30
+                )
+
         if response.status_code in (200, 201):
-            result = response.json()
+            result = orjson.loads(response.content)
             lead_id = result.get("id")
-            log_event(call_sid, "CRM_LEAD_CREATED", {"lead_id": lead_id, "success": result.get("success")})
+            log_event_async(call_sid, "CRM_LEAD_CREATED", {"lead_id": lead_id, "success": result.get("success")})
             return lead_id
         else:
-            log_event(call_sid, "CRM_LEAD_ERROR", {
+            log_event_async(call_sid, "CRM_LEAD_ERROR", {
                 "status": response.status_code,
                 "response": response.text[:500]
             })
             return None
 
     except requests.RequestException as e:
-        log_event(call_sid, "CRM_LEAD_REQUEST_FAILED", {"error": str(e)})
+        log_event_async(call_sid, "CRM_LEAD_REQUEST_FAILED", {"error": str(e)})
         return None
     except Exception as e:
-        log_event(call_sid, "CRM_LEAD_EXCEPTION", {"error": str(e)})
+        log_event_async(call_sid, "CRM_LEAD_EXCEPTION", {"error": str(e)})
         return None
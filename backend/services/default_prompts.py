@@ -1,5 +1,8 @@
 """Default data for initializing the database."""
 
+import sys
+from types import MappingProxyType
+
 DEFAULT_CORRECTIONS = {
     # Map common STT mishearings to canonical categories used by the IVR
     # Necklaces
@@ -110,3 +113,12 @@ DEFAULT_IVR_PROMPTS = {
     # Default fallback message when no agent available
     "no_agent": "Sorry, we cannot connect your call right now. Please try again later.",
 }
+
+
+# Freeze the defaults so callers can share them without defensive copies.
+# Correction targets repeat many times; interning keeps one object per value.
+DEFAULT_CORRECTIONS = MappingProxyType({
+    sys.intern(wrong): sys.intern(correct) for wrong, correct in DEFAULT_CORRECTIONS.items()
+})
+DEFAULT_GREETINGS = MappingProxyType(DEFAULT_GREETINGS)
+DEFAULT_IVR_PROMPTS = MappingProxyType(DEFAULT_IVR_PROMPTS)
@@ -2,17 +2,72 @@
 
 This service is optional and returns text unchanged if GEMINI_API_KEY is not set.
 """
+import asyncio
+import hashlib
 import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional
 
 from backend.config import get_settings
-from backend.services.logger import log_event
+from backend.services.logger import log_event, log_system_failure
 
 try:
     import google.generativeai as genai
+    from google.generativeai import client as genai_client
+    from google.api_core.exceptions import ResourceExhausted
     GENAI_AVAILABLE = True
 except ImportError:
     GENAI_AVAILABLE = False
+    ResourceExhausted = None
+
+
+MODERATION_INSTRUCTION = (
+    "You are a profanity filter. Analyze the user's text. "
+    "Respond with 'PROFANE' if it contains swear words, hate speech, or harassment. "
+    "Respond with 'CLEAN' otherwise. Provide no other text."
+)
+
+# Local fallback: blacklisted words anywhere in the text, or a censored token
+# (3+ non-space chars containing an asterisk), found in one regex pass
+BLACKLIST_WORDS = frozenset({
+    "fuck", "shit", "bitch", "asshole", "bastard", "damn",
+    "cunt", "dick", "piss", "cock", "pussy",
+})
+_BLACKLIST_PAT = re.compile(
+    "|".join(sorted(map(re.escape, BLACKLIST_WORDS), key=len, reverse=True))
+    + r"|(?<!\S)(?=\S*\*)\S{3,}",
+    re.IGNORECASE,
+)
+
+# Retry policy for quota errors (429); sleeps are capped so a caller on the
+# line never waits more than a few seconds before the blacklist fallback
+BACKOFF_ATTEMPTS = 3
+BACKOFF_BASE = 0.25  # seconds
+BACKOFF_MAX = 4.0  # seconds
+
+# Proactive pacing for the async path: at most GEMINI_MAX_CONCURRENCY requests
+# in flight, and a token bucket at 80% of the GEMINI_RPM quota
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+RATE_SAFETY_MARGIN = 0.8
+# Longest a caller waits for a rate token; past this the blacklist answers,
+# keeping the webhook well inside Twilio's response timeout
+RATE_WAIT_BUDGET = 1.0  # seconds
+
+_configured = False
+_configure_lock = threading.Lock()
+
+# LRU+TTL caches of model answers; repeated IVR utterances skip the round trip
+RESULT_CACHE_SIZE = 4096
+RESULT_CACHE_TTL = 3600  # seconds
+_MISS = object()
+_profanity_cache: "OrderedDict[str, tuple[bool, float]]" = OrderedDict()
+_category_cache: "OrderedDict[tuple, tuple[Optional[str], float]]" = OrderedDict()
+_result_cache_lock = threading.Lock()
 
 
 def _get_gemini_api_key() -> Optional[str]:
@@ -30,99 +85,281 @@ def _get_gemini_api_key() -> Optional[str]:
         return os.getenv("GEMINI_API_KEY")
 
 
-def filter_text_if_enabled(text: str) -> str:
-    """Optionally filter/rewrite text using Gemini for phone-friendly phrasing.
-    
-    If GEMINI_API_KEY is not set, returns the text unchanged.
+def _cache_get(cache: OrderedDict, key):
+    """Return a fresh cached value, or _MISS."""
+    with _result_cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return _MISS
+        value, stored_at = entry
+        if time.monotonic() - stored_at >= RESULT_CACHE_TTL:
+            del cache[key]
+            return _MISS
+        cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    """Store a value, evicting the least recently used entry when full."""
+    with _result_cache_lock:
+        cache[key] = (value, time.monotonic())
+        cache.move_to_end(key)
+        if len(cache) > RESULT_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _profanity_key(text: str) -> str:
+    return hashlib.sha256(text.strip().lower().encode()).hexdigest()
+
+
+def _configure_genai() -> None:
+    """Configure the SDK once per process and open its shared client.
+
+    Every GenerativeModel talks through the SDK's default client, so building
+    it here pays the channel/TLS setup once instead of on the first caller.
+    No transport is forced: the sync client then uses gRPC and the async
+    client gRPC-asyncio, which `generate_content_async` needs.
     """
-    api_key = _get_gemini_api_key()
-    if not api_key:
-        return text
-    
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if not _configured:
+            genai.configure(api_key=_get_gemini_api_key())
+            genai_client.get_default_generative_client()
+            _configured = True
+
+
+@lru_cache(maxsize=8)
+def _get_model(model_name: str, system_instruction: str):
+    """Return a shared GenerativeModel for this model/instruction pair."""
+    _configure_genai()
+    return genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+
+
+def _is_quota_error(exc: Exception) -> bool:
+    """True if an SDK error is a transient rate/quota rejection."""
+    if ResourceExhausted is not None and isinstance(exc, ResourceExhausted):
+        return True
+    message = str(exc).lower()
+    return "429" in message or "quota" in message
+
+
+def _backoff_delay(exc: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying, preferring the server's Retry-After hint."""
+    retry_after = getattr(exc, "retry_after", None)
+    response = getattr(exc, "response", None)
+    if retry_after is None and response is not None:
+        retry_after = (getattr(response, "headers", None) or {}).get("Retry-After")
+    try:
+        delay = float(retry_after) if retry_after is not None else BACKOFF_BASE * 2 ** attempt
+    except (TypeError, ValueError):
+        delay = BACKOFF_BASE * 2 ** attempt
+    return min(BACKOFF_MAX, delay) + random.uniform(0, 0.1)
+
+
+def _call_with_backoff(fn, *, attempts: int = BACKOFF_ATTEMPTS):
+    """Call `fn()`, retrying quota errors with exponential backoff and jitter."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt == attempts - 1 or not _is_quota_error(exc):
+                raise
+            time.sleep(_backoff_delay(exc, attempt))
+
+
+async def _call_with_backoff_async(fn, *, attempts: int = BACKOFF_ATTEMPTS):
+    """Async `_call_with_backoff`; `fn` returns an awaitable."""
+    for attempt in range(attempts):
+        try:
+            return await fn()
+        except Exception as exc:
+            if attempt == attempts - 1 or not _is_quota_error(exc):
+                raise
+            await asyncio.sleep(_backoff_delay(exc, attempt))
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: int = 1) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+_RATE_SEMAPHORE = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")))
+_bucket = TokenBucket(rate=GEMINI_RPM / 60 * RATE_SAFETY_MARGIN, burst=max(1, GEMINI_RPM // 4))
+
+
+class _RateLimited(Exception):
+    """No rate token became available within RATE_WAIT_BUDGET."""
+
+
+async def _paced(fn):
+    """Await `fn()` once a rate token and a concurrency slot are available.
+
+    Raises `_RateLimited` instead of queuing past RATE_WAIT_BUDGET.
+    """
+    try:
+        await asyncio.wait_for(_bucket.acquire(1), timeout=RATE_WAIT_BUDGET)
+    except asyncio.TimeoutError:
+        raise _RateLimited() from None
+    async with _RATE_SEMAPHORE:
+        return await fn()
+
+
+def _passthrough(text: str) -> str:
+    return text
+
+
+def _filter_text_with_gemini(text: str) -> str:
+    """Filter/rewrite text using Gemini for phone-friendly phrasing."""
     # For now, just return text unchanged.
     # TODO: Implement actual Gemini filtering if needed
     return text
 
 
+def reload_gemini() -> None:
+    """Re-read GEMINI_API_KEY, drop cached models and rebind `filter_text_if_enabled`.
+
+    The key is checked once at import so the per-turn filter never touches
+    settings or the environment; call this after changing the key at runtime.
+    """
+    global _GEMINI_ENABLED, _configured, filter_text_if_enabled
+    get_settings.cache_clear()
+    with _configure_lock:
+        _configured = False
+    _get_model.cache_clear()
+    _GEMINI_ENABLED = bool(_get_gemini_api_key())
+    filter_text_if_enabled = _filter_text_with_gemini if _GEMINI_ENABLED else _passthrough
+
+
+# Optionally filter/rewrite text for phone-friendly phrasing; when
+# GEMINI_API_KEY is not set this is a plain passthrough.
+_GEMINI_ENABLED = bool(_get_gemini_api_key())
+filter_text_if_enabled = _filter_text_with_gemini if _GEMINI_ENABLED else _passthrough
+
+
+def _is_safety_block(exc: Exception) -> bool:
+    """True if an SDK error means the prompt was blocked by safety filters."""
+    message = str(exc).lower()
+    return "block" in message or "safety" in message
+
+
+def _sdk_verdict(model_name: str, response_text: str) -> bool:
+    """Interpret and log a moderation model response."""
+    result = response_text.strip().upper()
+    log_event(None, "GEMINI_MODERATION_RESULT", {
+        "method": "sdk_model",
+        "model": model_name,
+        "response": result
+    })
+    return "PROFANE" in result or "YES" in result
+
+
+def _blocked_verdict() -> bool:
+    """Log a safety-filter block, which we treat as profane."""
+    log_event(None, "GEMINI_MODERATION_RESULT", {
+        "method": "sdk_model",
+        "response": "BLOCKED",
+        "profane": True
+    })
+    return True
+
+
+def _local_verdict(text: str) -> bool:
+    """Check text against the local blacklist and log the result."""
+    m = _BLACKLIST_PAT.search(text)
+    matched = m.group(0).lower() if m else None
+
+    profane_local = bool(matched)
+    log_event(None, "GEMINI_MODERATION_RESULT", {
+        "method": "local",
+        "profane": profane_local,
+        "matched": matched
+    })
+    return profane_local
+
+
 def is_profane(text: str) -> bool:
     """Return True if `text` contains profanity using Google Gemini SDK.
 
     Uses gemini-2.5-flash-lite (free tier) with system instruction for profanity detection.
     Falls back to local blacklist if SDK unavailable or API call fails.
     """
-    from backend.services.logger import log_system_failure, log_event
-
     if not text:
         return False
 
-    api_key = _get_gemini_api_key()
-
-    # Try Gemini SDK if available and configured
-    if api_key and GENAI_AVAILABLE:
+    # Try Gemini SDK if available and configured; only model verdicts are cached
+    if _get_gemini_api_key() and GENAI_AVAILABLE:
+        key = _profanity_key(text)
+        cached = _cache_get(_profanity_cache, key)
+        if cached is not _MISS:
+            return cached
         try:
-            genai.configure(api_key=api_key)
             model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
-            
-            model = genai.GenerativeModel(
-                model_name=model_name,
-                system_instruction="You are a profanity filter. Analyze the user's text. "
-                                   "Respond with 'PROFANE' if it contains swear words, hate speech, or harassment. "
-                                   "Respond with 'CLEAN' otherwise. Provide no other text."
-            )
-            
-            response = model.generate_content(text)
-            result = response.text.strip().upper()
-            
-            log_event(None, "GEMINI_MODERATION_RESULT", {
-                "method": "sdk_model",
-                "model": model_name,
-                "response": result
-            })
-            
-            return "PROFANE" in result or "YES" in result
-            
+            model = _get_model(model_name, MODERATION_INSTRUCTION)
+            response = _call_with_backoff(lambda: model.generate_content(text))
+            verdict = _sdk_verdict(model_name, response.text)
+            _cache_put(_profanity_cache, key, verdict)
+            return verdict
         except Exception as exc:
             # If blocked by safety filters, it's likely profane
-            if "block" in str(exc).lower() or "safety" in str(exc).lower():
-                log_event(None, "GEMINI_MODERATION_RESULT", {
-                    "method": "sdk_model",
-                    "response": "BLOCKED",
-                    "profane": True
-                })
-                return True
+            if _is_safety_block(exc):
+                _cache_put(_profanity_cache, key, True)
+                return _blocked_verdict()
             log_system_failure(None, "gemini_sdk", f"error calling SDK: {exc}")
 
     # Fallback to local blacklist
-    lower = text.lower()
-    tokens = lower.split()
+    return _local_verdict(text)
 
-    blacklist = {
-        "fuck", "shit", "bitch", "asshole", "bastard", "damn",
-        "cunt", "dick", "piss", "cock", "pussy"
-    }
 
-    matched = None
+async def is_profane_async(text: str) -> bool:
+    """Async variant of `is_profane` for request handlers.
 
-    # 1) Exact/substring match
-    for w in blacklist:
-        if w in lower:
-            matched = w
-            break
+    Awaits the SDK's native async call, so the event loop keeps serving other
+    calls during the Gemini round trip instead of blocking on it.
+    """
+    if not text:
+        return False
 
-    # 2) Censored tokens with asterisks
-    if not matched:
-        for token in tokens:
-            if "*" in token and len(token) >= 3:
-                matched = token
-                break
+    if _get_gemini_api_key() and GENAI_AVAILABLE:
+        key = _profanity_key(text)
+        cached = _cache_get(_profanity_cache, key)
+        if cached is not _MISS:
+            return cached
+        try:
+            model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+            model = _get_model(model_name, MODERATION_INSTRUCTION)
+            response = await _call_with_backoff_async(
+                lambda: _paced(lambda: model.generate_content_async(text))
+            )
+            verdict = _sdk_verdict(model_name, response.text)
+            _cache_put(_profanity_cache, key, verdict)
+            return verdict
+        except _RateLimited:
+            # Over the local RPM budget; answer now rather than queue
+            log_event(None, "GEMINI_RATE_LIMITED", {"wait_budget": RATE_WAIT_BUDGET})
+        except Exception as exc:
+            if _is_safety_block(exc):
+                _cache_put(_profanity_cache, key, True)
+                return _blocked_verdict()
+            log_system_failure(None, "gemini_sdk", f"error calling SDK: {exc}")
 
-    profane_local = bool(matched)
-    log_event(None, "GEMINI_MODERATION_RESULT", {
-        "method": "local",
-        "profane": profane_local,
-        "matched": matched
-    })
-    return profane_local
+    return _local_verdict(text)
 
 
 def debug_moderation(text: str) -> dict:
@@ -131,8 +368,6 @@ def debug_moderation(text: str) -> dict:
     Returns a dict with keys: profane (bool), method ("sdk_model"|"local"),
     matched, model_response, sdk_available, error
     """
-    from backend.services.logger import log_system_failure
-
     result = {
         "profane": False,
         "method": None,
@@ -150,17 +385,10 @@ def debug_moderation(text: str) -> dict:
     # Try Gemini SDK if available and configured
     if api_key and GENAI_AVAILABLE:
         try:
-            genai.configure(api_key=api_key)
             model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
-            
-            model = genai.GenerativeModel(
-                model_name=model_name,
-                system_instruction="You are a profanity filter. Analyze the user's text. "
-                                   "Respond with 'PROFANE' if it contains swear words, hate speech, or harassment. "
-                                   "Respond with 'CLEAN' otherwise. Provide no other text."
-            )
-            
-            response = model.generate_content(text)
+            model = _get_model(model_name, MODERATION_INSTRUCTION)
+
+            response = _call_with_backoff(lambda: model.generate_content(text))
             response_text = response.text.strip().upper()
             
             result["model_response"] = response_text
@@ -180,19 +408,8 @@ def debug_moderation(text: str) -> dict:
             log_system_failure(None, "gemini_sdk", f"error calling SDK: {exc}")
 
     # Fallback to local blacklist
-    lower = text.lower()
-    tokens = lower.split()
-    blacklist = {"fuck", "shit", "bitch", "asshole", "bastard", "damn", "cunt", "dick", "piss", "cock", "pussy"}
-    matched = None
-    for w in blacklist:
-        if w in lower:
-            matched = w
-            break
-    if not matched:
-        for token in tokens:
-            if "*" in token and len(token) >= 3:
-                matched = token
-                break
+    m = _BLACKLIST_PAT.search(text)
+    matched = m.group(0).lower() if m else None
 
     result["method"] = "local"
     result["matched"] = matched
@@ -200,7 +417,19 @@ def debug_moderation(text: str) -> dict:
     return result
 
 
-def infer_category_from_product(product_name: str, allowed_categories: list[str]) -> str | None:
+@lru_cache(maxsize=32)
+def _prep_categories(categories: tuple[str, ...]) -> tuple[str, dict[str, str]]:
+    """Build the classifier instruction and lowercase lookup once per category set."""
+    system_instruction = (
+        "You are a helpful classifier. Choose the single best category for the given product name. "
+        "Only respond with exactly one of the following category names (case-sensitive): "
+        f"{', '.join(categories)}. "
+        "If none apply, respond with NONE. Provide NO other text or explanation."
+    )
+    return system_instruction, {c.lower(): c for c in categories}
+
+
+def infer_category_from_product(product_name: str, allowed_categories: tuple[str, ...] | list[str]) -> str | None:
     """Use Gemini to infer a single category from a product name.
 
     Returns one of the `allowed_categories` (exact string) or None if no confident match.
@@ -213,42 +442,32 @@ def infer_category_from_product(product_name: str, allowed_categories: list[str]
     if not api_key or not GENAI_AVAILABLE:
         return None
 
+    categories = tuple(sorted(allowed_categories))
+    cache_key = (product_name.strip().lower(), categories)
+    cached = _cache_get(_category_cache, cache_key)
+    if cached is not _MISS:
+        return cached
+
     try:
-        genai.configure(api_key=api_key)
         model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+        system_instruction, lowered = _prep_categories(categories)
+        model = _get_model(model_name, system_instruction)
 
-        system_instruction = (
-            "You are a helpful classifier. Choose the single best category for the given product name. "
-            "Only respond with exactly one of the following category names (case-sensitive): "
-            f"{', '.join(allowed_categories)}. "
-            "If none apply, respond with NONE. Provide NO other text or explanation."
-        )
-
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            system_instruction=system_instruction,
-        )
-
-        response = model.generate_content(product_name)
+        response = _call_with_backoff(lambda: model.generate_content(product_name))
         text = (response.text or "").strip()
         # Normalize and try to match exactly or case-insensitively
-        if not text:
-            return None
-        # Some models may include newline or punctuation — strip to first token/line
-        candidate = text.splitlines()[0].strip()
-        # Exact match
-        if candidate in allowed_categories:
-            log_event(None, "GEMINI_CATEGORY_INFERRED", {"model": model_name, "category": candidate, "product_name": product_name})
-            return candidate
-        # Case-insensitive match
-        lowered = {c.lower(): c for c in allowed_categories}
-        if candidate.lower() in lowered:
-            resolved = lowered[candidate.lower()]
-            log_event(None, "GEMINI_CATEGORY_INFERRED", {"model": model_name, "category": resolved, "product_name": product_name})
-            return resolved
-
-        # If model returned 'NONE' or couldn't be mapped, return None
-        return None
+        resolved = None
+        if text:
+            # Some models may include newline or punctuation — strip to first token/line
+            candidate = text.splitlines()[0].strip()
+            # Exact match, then case-insensitive match
+            resolved = candidate if candidate in categories else lowered.get(candidate.lower())
+            if resolved:
+                log_event(None, "GEMINI_CATEGORY_INFERRED", {"model": model_name, "category": resolved, "product_name": product_name})
+
+        # A 'NONE' or unmappable answer is cached too; SDK errors are not
+        _cache_put(_category_cache, cache_key, resolved)
+        return resolved
     except Exception as exc:
         log_event(None, "GEMINI_CATEGORY_ERROR", {"error": str(exc), "product_name": product_name})
         return None
@@ -2,10 +2,17 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import case, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
 
 from backend.db import SessionLocal
-from backend.models.db_models import Call, CallLead
+from backend.models.db_models import CallLead
+from backend.services.calls import resolve_call_id
 
 LANGUAGE_BY_CURRENCY = {
     "INR": "hi-IN",
@@ -16,274 +23,239 @@ LANGUAGE_BY_CURRENCY = {
 
 DEFAULT_LANGUAGE = "en-IN"
 
+# Both spellings of each code, so the usual inputs skip the .upper() call
+_LANGUAGE_TABLE = {
+    **{code.lower(): language for code, language in LANGUAGE_BY_CURRENCY.items()},
+    **LANGUAGE_BY_CURRENCY,
+}
+
 
 def _language_for_currency(currency: Optional[str]) -> str:
     if not currency:
         return DEFAULT_LANGUAGE
-    return LANGUAGE_BY_CURRENCY.get(currency.upper(), DEFAULT_LANGUAGE)
+    language = _LANGUAGE_TABLE.get(currency)
+    if language is None:
+        language = _LANGUAGE_TABLE.get(currency.upper(), DEFAULT_LANGUAGE)
+    return language
 
 
-def upsert_call_lead(payload: Dict[str, Any]) -> CallLead:
-    """Create or update a CallLead row with website-provided context."""
-    call_sid = payload["call_sid"]
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
-
-        # Attach Call FK if record already exists
-        if not lead.call_id:
-            call = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-            if call:
-                lead.call_id = call.id
-
-        lead.page_context = payload.get("page_context", lead.page_context or "home")
-        if payload.get("currency"):
-            lead.currency = payload["currency"].upper()
-        lead.user_type = payload.get("user_type", lead.user_type)
-        lead.customer_id = payload.get("customer_id", lead.customer_id)
-        lead.product_id = payload.get("product_id", lead.product_id)
-        # Important: website context updates should not wipe IVR-captured metadata
-        # (intent, caller_name, etc). Merge dictionaries and protect reserved keys.
-        if "metadata" in payload and payload.get("metadata") is not None:
-            incoming_meta = payload.get("metadata") or {}
-            existing_meta = lead.extra_metadata or {}
-
-            reserved_keys = {"intent", "caller_name", "assist_type", "caller_description"}
-            merged = dict(existing_meta)
-            for key, value in incoming_meta.items():
-                if key in reserved_keys and merged.get(key) is not None:
-                    continue
-                merged[key] = value
-            lead.extra_metadata = merged
-
-        incoming_category = payload.get("product_category")
-        if incoming_category:
-            lead.selected_category = incoming_category.lower()
-
-        if payload.get("preferred_language"):
-            lead.preferred_language = payload["preferred_language"]
-        elif lead.currency:
-            lead.preferred_language = _language_for_currency(lead.currency)
-        elif not lead.preferred_language:
-            lead.preferred_language = DEFAULT_LANGUAGE
+@contextmanager
+def _lead_session(db: Optional[Session]) -> Iterator[Session]:
+    """Yield the caller's session, or a private one for a single operation.
 
-        db.add(lead)
+    A caller-provided session is only flushed; the caller owns the commit, so
+    several lead updates in one request share one connection and transaction.
+    A private session commits and closes, keeping loaded attributes so the
+    returned lead stays readable after close.
+    """
+    if db is not None:
+        yield db
+        db.flush()
+        return
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        yield db
         db.commit()
-        db.refresh(lead)
-        return lead
     finally:
         db.close()
 
 
-def get_lead_by_call_sid(call_sid: str) -> Optional[CallLead]:
-    db = SessionLocal()
-    try:
+def _upsert_lead(db: Session, call_sid: str, metadata: Optional[Dict[str, Any]] = None, **columns: Any) -> CallLead:
+    """Create or update a lead in a single INSERT ... ON CONFLICT statement.
+
+    `metadata` keys are merged into extra_metadata server-side (jsonb ||), so
+    there is no read-modify-write window between concurrent webhooks.
+    """
+    values = dict(columns)
+    if metadata:
+        values["extra_metadata"] = metadata
+    stmt = pg_insert(CallLead).values(call_sid=call_sid, **values)
+
+    updates = {name: stmt.excluded[name] for name in columns}
+    if metadata:
+        updates["extra_metadata"] = func.coalesce(
+            CallLead.extra_metadata, text("'{}'::jsonb")
+        ).op("||")(stmt.excluded.extra_metadata)
+    # ON CONFLICT DO UPDATE skips Python-side onupdate hooks
+    updates["updated_at"] = datetime.utcnow()
+
+    stmt = stmt.on_conflict_do_update(index_elements=["call_sid"], set_=updates).returning(CallLead)
+    return db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+
+# IVR-captured metadata that website context updates must not overwrite
+_RESERVED_METADATA_KEYS = ("intent", "caller_name", "assist_type", "caller_description")
+
+
+def upsert_call_lead(payload: Dict[str, Any], db: Optional[Session] = None) -> CallLead:
+    """Create or update a CallLead row with website-provided context.
+
+    Runs as one INSERT ... ON CONFLICT (call_sid) DO UPDATE; every merge rule
+    is evaluated against the stored row inside that statement.
+    """
+    call_sid = payload["call_sid"]
+    with _lead_session(db) as db:
+        values: Dict[str, Any] = {"call_sid": call_sid, "call_id": resolve_call_id(db, call_sid)}
+        for column in ("page_context", "user_type", "customer_id", "product_id"):
+            if column in payload:
+                values[column] = payload[column]
+        currency = payload["currency"].upper() if payload.get("currency") else None
+        if currency:
+            values["currency"] = currency
+        if payload.get("product_category"):
+            values["selected_category"] = payload["product_category"].lower()
+        incoming_meta = payload.get("metadata")
+        if incoming_meta is not None:
+            values["extra_metadata"] = incoming_meta or {}
+
+        if payload.get("preferred_language"):
+            values["preferred_language"] = payload["preferred_language"]
+        else:
+            values["preferred_language"] = _language_for_currency(currency)
+
+        stmt = pg_insert(CallLead).values(**values)
+        excluded = stmt.excluded
+
+        # Attach Call FK if the lead doesn't have one yet
+        updates: Dict[str, Any] = {"call_id": func.coalesce(CallLead.call_id, excluded.call_id)}
+        for column in ("page_context", "user_type", "customer_id", "product_id", "currency", "selected_category"):
+            if column in values:
+                updates[column] = excluded[column]
+
+        if incoming_meta is not None:
+            # Important: website context updates should not wipe IVR-captured metadata
+            # (intent, caller_name, etc). Merge, then re-apply stored reserved keys.
+            stored = CallLead.extra_metadata
+            protected = func.jsonb_strip_nulls(func.jsonb_build_object(
+                *(part for key in _RESERVED_METADATA_KEYS for part in (literal(key), stored[key]))
+            ))
+            updates["extra_metadata"] = (
+                func.coalesce(stored, text("'{}'::jsonb")).op("||")(excluded.extra_metadata).op("||")(protected)
+            )
+
+        if payload.get("preferred_language") or currency:
+            updates["preferred_language"] = excluded.preferred_language
+        else:
+            # Derive from the stored currency, else keep the stored language
+            updates["preferred_language"] = case(
+                (CallLead.currency.isnot(None), case(
+                    LANGUAGE_BY_CURRENCY, value=func.upper(CallLead.currency), else_=DEFAULT_LANGUAGE,
+                )),
+                else_=func.coalesce(CallLead.preferred_language, DEFAULT_LANGUAGE),
+            )
+        # ON CONFLICT DO UPDATE skips Python-side onupdate hooks
+        updates["updated_at"] = datetime.utcnow()
+
+        stmt = stmt.on_conflict_do_update(index_elements=["call_sid"], set_=updates).returning(CallLead)
+        return db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+
+def get_lead_by_call_sid(call_sid: str, db: Optional[Session] = None) -> Optional[CallLead]:
+    with _lead_session(db) as db:
         return db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-    finally:
-        db.close()
 
 
-def record_category_selection(call_sid: str, category: str) -> Optional[CallLead]:
-    db = SessionLocal()
-    try:
+def record_category_selection(call_sid: str, category: str, db: Optional[Session] = None) -> Optional[CallLead]:
+    with _lead_session(db) as db:
         lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
         if not lead:
             return None
         lead.selected_category = category.lower()
         if not lead.preferred_language and lead.currency:
             lead.preferred_language = _language_for_currency(lead.currency)
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
         return lead
-    finally:
-        db.close()
 
 
-def record_intent(call_sid: str, intent: str) -> Optional[CallLead]:
+def record_intent(call_sid: str, intent: str, db: Optional[Session] = None) -> Optional[CallLead]:
     """Record the caller's top-level intent (general_inquiry / store / price_request)."""
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
-
-        extra = dict(lead.extra_metadata or {})
-        extra["intent"] = intent
-        lead.extra_metadata = extra
+    with _lead_session(db) as db:
+        return _upsert_lead(db, call_sid, {"intent": intent})
 
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
-        return lead
-    finally:
-        db.close()
 
-
-def record_assist_type(call_sid: str, assist_type: str) -> Optional[CallLead]:
+def record_assist_type(call_sid: str, assist_type: str, db: Optional[Session] = None) -> Optional[CallLead]:
     """Record whether the caller wants help with a specific product or a category.
 
     `assist_type` should be either 'product' or 'category'.
     """
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
+    with _lead_session(db) as db:
+        return _upsert_lead(db, call_sid, {"assist_type": assist_type})
 
-        extra = dict(lead.extra_metadata or {})
-        extra["assist_type"] = assist_type
-        lead.extra_metadata = extra
 
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
-        return lead
-    finally:
-        db.close()
-
-
-def record_product_id(call_sid: str, product_id: str) -> Optional[CallLead]:
+def record_product_id(call_sid: str, product_id: str, db: Optional[Session] = None) -> Optional[CallLead]:
     """Store the provided Product name on the call lead.
 
     NOTE: the DB column is `product_id` but we reuse it to store the
     human-friendly product name provided by the caller.
     """
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
-
+    with _lead_session(db) as db:
         # Store the product name in the existing product_id column
-        lead.product_id = product_id
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
-        return lead
-    finally:
-        db.close()
+        return _upsert_lead(db, call_sid, product_id=product_id)
 
 
-def record_description(call_sid: str, description: str) -> Optional[CallLead]:
+def record_description(call_sid: str, description: str, db: Optional[Session] = None) -> Optional[CallLead]:
     """Store a short free-text description the caller gave before handoff."""
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
+    with _lead_session(db) as db:
+        return _upsert_lead(db, call_sid, {"caller_description": description})
 
-        extra = dict(lead.extra_metadata or {})
-        extra["caller_description"] = description
-        lead.extra_metadata = extra
 
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
-        return lead
-    finally:
-        db.close()
-
-
-def record_caller_name(call_sid: str, caller_name: str) -> Optional[CallLead]:
+def record_caller_name(call_sid: str, caller_name: str, db: Optional[Session] = None) -> Optional[CallLead]:
     """Store the caller's name (from IVR question)."""
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
+    with _lead_session(db) as db:
+        return _upsert_lead(db, call_sid, {"caller_name": caller_name})
 
-        extra = dict(lead.extra_metadata or {})
-        extra["caller_name"] = caller_name
-        lead.extra_metadata = extra
 
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
-        return lead
-    finally:
-        db.close()
+def _get_lead_metadata_value(call_sid: str, key: str, db: Optional[Session]) -> Optional[str]:
+    """Fetch a single extra_metadata key as text; Postgres extracts it server-side."""
+    with _lead_session(db) as db:
+        return db.execute(
+            select(CallLead.extra_metadata[key].astext).filter_by(call_sid=call_sid)
+        ).scalar()
 
 
-def get_caller_name(call_sid: str) -> Optional[str]:
+def get_caller_name(call_sid: str, db: Optional[Session] = None) -> Optional[str]:
     """Retrieve the caller's name from the lead."""
-    lead = get_lead_by_call_sid(call_sid)
-    if lead and lead.extra_metadata:
-        return lead.extra_metadata.get("caller_name")
-    return None
+    return _get_lead_metadata_value(call_sid, "caller_name", db)
 
 
-def get_caller_intent(call_sid: str) -> Optional[str]:
+def get_caller_intent(call_sid: str, db: Optional[Session] = None) -> Optional[str]:
     """Retrieve the caller's intent from the lead."""
-    lead = get_lead_by_call_sid(call_sid)
-    if lead and lead.extra_metadata:
-        return lead.extra_metadata.get("intent")
-    return None
+    return _get_lead_metadata_value(call_sid, "intent", db)
 
 
-def get_caller_description(call_sid: str) -> Optional[str]:
+def get_caller_description(call_sid: str, db: Optional[Session] = None) -> Optional[str]:
     """Retrieve the caller's description from the lead."""
-    lead = get_lead_by_call_sid(call_sid)
-    if lead and lead.extra_metadata:
-        return lead.extra_metadata.get("caller_description")
-    return None
+    return _get_lead_metadata_value(call_sid, "caller_description", db)
 
 
-def record_full_interaction(call_sid: str, *, intent: str | None = None, assist_type: str | None = None, product_id: str | None = None, product_category: str | None = None, description: str | None = None) -> Optional[CallLead]:
+def record_full_interaction(call_sid: str, *, intent: str | None = None, assist_type: str | None = None, product_id: str | None = None, product_category: str | None = None, description: str | None = None, db: Optional[Session] = None) -> Optional[CallLead]:
     """Convenience helper to record multiple values at once on the CallLead.
 
     Only non-None values are written.
     """
-    db = SessionLocal()
-    try:
-        lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
-        if not lead:
-            lead = CallLead(call_sid=call_sid)
-
+    with _lead_session(db) as db:
+        metadata = {}
+        columns = {}
         if intent is not None:
-            extra = dict(lead.extra_metadata or {})
-            extra["intent"] = intent
-            lead.extra_metadata = extra
-
+            metadata["intent"] = intent
         if assist_type is not None:
-            extra = dict(lead.extra_metadata or {})
-            extra["assist_type"] = assist_type
-            lead.extra_metadata = extra
-
+            metadata["assist_type"] = assist_type
         if product_id is not None:
-            lead.product_id = product_id
-
+            columns["product_id"] = product_id
         if product_category is not None:
-            lead.selected_category = product_category.lower()
-
+            columns["selected_category"] = product_category.lower()
         if description is not None:
-            extra = dict(lead.extra_metadata or {})
-            extra["caller_description"] = description
-            lead.extra_metadata = extra
+            metadata["caller_description"] = description
+        return _upsert_lead(db, call_sid, metadata, **columns)
 
-        db.add(lead)
-        db.commit()
-        db.refresh(lead)
-        return lead
-    finally:
-        db.close()
 
-
-def link_lead_to_call(call_sid: str, call_id: Optional[str]) -> None:
+def link_lead_to_call(call_sid: str, call_id: Optional[str], db: Optional[Session] = None) -> None:
     if not call_id:
         return
-    db = SessionLocal()
-    try:
+    with _lead_session(db) as db:
         lead = db.query(CallLead).filter_by(call_sid=call_sid).one_or_none()
         if not lead or lead.call_id:
             return
         lead.call_id = call_id
-        db.add(lead)
-        db.commit()
-    finally:
-        db.close()
 
 
 def derive_language_from_lead(lead: Optional[CallLead], fallback_currency: Optional[str] = None) -> str:
@@ -1,9 +1,20 @@
-from datetime import datetime
-from typing import Any, Dict
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
 import logging
+import queue
+import random
+import sys
+import threading
+import time
 
+import orjson
+
+from backend.config import get_settings
 from backend.db import SessionLocal
-from backend.models.db_models import Call, CallEvent
+from backend.models.db_models import CallEvent
+from backend.services.calls import resolve_call_ids
 
 # Configure module logger; uvicorn will capture these logs.
 logger = logging.getLogger("call_routing")
@@ -15,68 +26,233 @@ if not logger.handlers:
     logger.setLevel(logging.INFO)
 
 
-def log_event(call_sid: str | None, event_type: str, payload: Dict[str, Any]) -> None:
-    """Persist a structured event for this call and log to stdout/logger.
+# Event records go to stdout as one JSON line each; the logger is kept for
+# warnings and errors.
+def _emit(record: Dict[str, Any]) -> None:
+    line = orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    # Looked up per call: stdout may be swapped (test capture, reloaders,
+    # redirect_stdout) and replacements need not have a byte buffer
+    out = sys.stdout
+    buffer = getattr(out, "buffer", None)
+    if buffer is not None:
+        buffer.write(line)
+    else:
+        out.write(line.decode())
+
+
+# Events are persisted by one background thread: up to EVENT_BATCH_SIZE rows
+# per transaction, flushed at least every EVENT_FLUSH_INTERVAL seconds.
+LOG_QUEUE_MAXSIZE = 10_000
+EVENT_BATCH_SIZE = 100
+EVENT_FLUSH_INTERVAL = 0.1  # seconds
+DEDUPE_WINDOW = 5.0  # seconds
+DEDUPE_CACHE_SIZE = 8192
+
+# (call_sid, event_type, payload, time.time_ns() at log time)
+QueuedEvent = Tuple[Optional[str], str, Dict[str, Any], int]
+_log_queue: "queue.Queue[QueuedEvent]" = queue.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+
+# Per-type fraction of events persisted; failures are never sampled out
+_SAMPLE_RATES = dict(get_settings().EVENT_SAMPLE_RATES)
+_SAMPLE_RATES.pop("SYSTEM_FAILURE", None)
+
+# Events dropped because the queue was full; see dropped_event_count()
+_dropped_events = 0
+_dropped_events_lock = threading.Lock()
+
+# (event_type, call_sid, payload hash) -> monotonic time last accepted
+_recent_events: "OrderedDict[tuple, float]" = OrderedDict()
+_recent_events_lock = threading.Lock()
+
+
+def _iso(ns: int) -> str:
+    """Format a time.time_ns() value as an ISO-8601 UTC timestamp."""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+
+def _payload_hash(payload: Dict[str, Any]) -> str:
+    try:
+        encoded = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    except TypeError:
+        encoded = repr(payload).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
 
-    Uses both print() (quick debug) and the Python logging module so messages
-    appear in uvicorn-managed logs and any log collectors.
+
+def _is_recent_duplicate(call_sid: str | None, event_type: str, payload: Dict[str, Any]) -> bool:
+    """True if the same event was accepted in the last DEDUPE_WINDOW seconds.
+
+    Guards against near-duplicate events caused by reloaders/retries. This is
+    per process; the LRU is bounded to DEDUPE_CACHE_SIZE keys.
     """
-    timestamp = datetime.utcnow().isoformat()
-    now = datetime.utcnow()
+    key = (event_type, call_sid, _payload_hash(payload))
+    now = time.monotonic()
+    with _recent_events_lock:
+        last_seen = _recent_events.get(key)
+        if last_seen is not None and now - last_seen < DEDUPE_WINDOW:
+            return True
+        _recent_events[key] = now
+        _recent_events.move_to_end(key)
+        if len(_recent_events) > DEDUPE_CACHE_SIZE:
+            _recent_events.popitem(last=False)
+    return False
 
-    # Prepare a record for console/log output (without DB timestamp)
-    record = {
+
+def _sampled_out(call_sid: str | None, event_type: str, payload: Dict[str, Any]) -> bool:
+    """Apply EVENT_SAMPLE_RATES; dropped events still go to the console log."""
+    rate = _SAMPLE_RATES.get(event_type)
+    if rate is None or random.random() < rate:
+        return False
+    _emit({
         "call_sid": call_sid,
         "event": event_type,
         "payload": payload,
-        "timestamp": timestamp,
-    }
+        "timestamp": _iso(time.time_ns()),
+        "sampled_out": True,
+    })
+    sys.stdout.flush()
+    return True
+
 
-    # DB log (Postgres) — avoid near-duplicate events caused by reloaders/processes
+def _write_events(events: List[QueuedEvent]) -> None:
+    """Persist a batch of events in one transaction and echo them to stdout.
+
+    If the batch insert fails, the rows are retried one at a time so a single
+    bad event (unserializable payload, constraint violation) is the only loss.
+    """
+    # DB log (Postgres)
     db = SessionLocal()
     try:
-        call = None
-        if call_sid:
-            call = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
+        # Resolve every call in the batch at once; known calls come from the cache
+        call_ids = resolve_call_ids(db, {call_sid for call_sid, _, _, _ in events})
 
-        # Deduplicate: if an event with same type and payload was created in last 5s, skip it
-        try:
-            from datetime import timedelta
-
-            cutoff = now - timedelta(seconds=5)
-            q = db.query(CallEvent).filter(CallEvent.event_type == event_type, CallEvent.created_at >= cutoff)
-            if call:
-                q = q.filter(CallEvent.call_id == call.id)
-            if payload:
-                # JSONB contains operator: matches if stored JSON contains the given payload keys/values
-                q = q.filter(CallEvent.event_payload.contains(payload))
-            dup = q.first()
-            if dup:
-                return
-        except Exception:
-            # If dedupe query fails for any reason, continue and log normally
-            pass
+        rows = []
+        for call_sid, event_type, payload, occurred_ns in events:
+            call_id = call_ids.get(call_sid)
+            occurred_at = datetime.fromtimestamp(occurred_ns / 1e9, tz=timezone.utc)
+            timestamp = occurred_at.isoformat()
 
-        # Emit via logging so uvicorn captures it consistently
-        try:
-            logger.info(record)
-        except Exception:
-            pass
-
-        event = CallEvent(
-            call_id=call.id if call else None,
-            event_type=event_type,
-            event_payload={
-                **payload,
-                "timestamp": timestamp,
-            },
-        )
-        db.add(event)
-        db.commit()
+            try:
+                _emit({
+                    "call_sid": call_sid,
+                    "event": event_type,
+                    "payload": payload,
+                    "timestamp": timestamp,
+                })
+            except Exception:
+                pass
+
+            rows.append({
+                "call_id": call_id,
+                "event_type": event_type,
+                "event_payload": {**payload, "timestamp": timestamp},
+                "created_at": occurred_at.replace(tzinfo=None),
+            })
+
+        sys.stdout.flush()
+
+        if rows:
+            try:
+                db.bulk_insert_mappings(CallEvent, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Batch insert of %d events failed; retrying one at a time", len(rows))
+                for row in rows:
+                    try:
+                        db.bulk_insert_mappings(CallEvent, [row])
+                        db.commit()
+                    except Exception:
+                        db.rollback()
+                        logger.exception("Dropped %s event that could not be stored", row["event_type"])
     finally:
         db.close()
 
 
+def _drain_log_queue() -> None:
+    """Write queued events in batches, forever."""
+    while True:
+        batch = [_log_queue.get()]
+        deadline = time.monotonic() + EVENT_FLUSH_INTERVAL
+        while len(batch) < EVENT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            _write_events(batch)
+        except Exception:
+            logger.exception("Failed to persist %d queued events", len(batch))
+        finally:
+            for _ in batch:
+                _log_queue.task_done()
+
+
+def _enqueue(call_sid: str | None, event_type: str, payload: Dict[str, Any]) -> bool:
+    """Dedupe, sample and queue one event; returns True if it was queued.
+
+    A full queue drops the event and counts it rather than writing from the
+    caller's thread, which may be the event loop.
+    """
+    global _dropped_events
+    if _is_recent_duplicate(call_sid, event_type, payload):
+        return False
+    if _sampled_out(call_sid, event_type, payload):
+        return False
+    try:
+        _log_queue.put_nowait((call_sid, event_type, payload, time.time_ns()))
+        return True
+    except queue.Full:
+        with _dropped_events_lock:
+            _dropped_events += 1
+            dropped = _dropped_events
+        logger.warning("Event log queue full; dropped %s (%d dropped so far)", event_type, dropped)
+        return False
+
+
+def dropped_event_count() -> int:
+    """Return how many events were dropped on a full queue since startup."""
+    return _dropped_events
+
+
+def log_event(call_sid: str | None, event_type: str, payload: Dict[str, Any]) -> None:
+    """Record a structured event for this call.
+
+    The event is queued and persisted (and echoed to stdout) by the
+    background writer, so callers never wait on the database. If the queue is
+    full the event is dropped and counted. Repeats of the same event within
+    DEDUPE_WINDOW seconds are skipped, and event types listed in
+    EVENT_SAMPLE_RATES are only stored for that fraction of calls.
+    """
+    _enqueue(call_sid, event_type, payload)
+
+
+def log_event_async(call_sid: str | None, event_type: str, payload: Dict[str, Any]) -> None:
+    """Record an event from the event loop; never blocks the caller.
+
+    Same behavior as `log_event`, kept as the name async call sites use.
+    """
+    _enqueue(call_sid, event_type, payload)
+
+
+def flush_event_log(timeout: float = 5.0) -> bool:
+    """Wait up to `timeout` seconds for queued events to be written.
+
+    Returns True if the queue drained in time.
+    """
+    deadline = time.monotonic() + timeout
+    while _log_queue.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
 def log_system_failure(call_sid: str | None, source: str, error: str) -> None:
     """Record a system failure related to a call for incident analysis."""
     log_event(call_sid, "SYSTEM_FAILURE", {"source": source, "error": error})
+
+
+threading.Thread(target=_drain_log_queue, name="event-log-writer", daemon=True).start()
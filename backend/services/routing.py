@@ -1,68 +1,185 @@
-from twilio.rest import Client
+import asyncio
+from collections import OrderedDict
+import json
+import re
+import threading
+import time
+from xml.sax.saxutils import escape
+
+from sqlalchemy.orm import Session
 from twilio.base.exceptions import TwilioRestException
 
 from backend.config import get_settings
 from backend.db import SessionLocal
 from backend.models.db_models import Call, RoutingDecision
-from backend.services.logger import log_event
-import json
+from backend.services.calls import resolve_call_id
+from backend.services.logger import log_event_async
+from backend.services.twilio_service import get_async_twilio_client, get_twilio_client
 from typing import Optional
 
 
 settings = get_settings()
 
-# Configure the Twilio REST client
-client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+# Shared, connection-pooled Twilio REST client
+client = get_twilio_client()
 
 # US / India agent pool numbers or queues
 US_AGENT_POOL = settings.US_AGENT_POOL
 INDIA_AGENT_POOL = settings.INDIA_AGENT_POOL
 
+# TaskRouter settings, bound once for the routing hot path
+US_SUPPORT_QUEUE_SID = settings.US_SUPPORT_QUEUE_SID
+INDIA_SUPPORT_QUEUE_SID = settings.INDIA_SUPPORT_QUEUE_SID
+TASKROUTER_WORKSPACE_SID = settings.TASKROUTER_WORKSPACE_SID
+
+# Dial TwiML for each pool, rendered once; any non-US caller goes to India
+_TWIML_US = f"<Response><Dial>{escape(US_AGENT_POOL)}</Dial></Response>"
+_TWIML_INDIA = f"<Response><Dial>{escape(INDIA_AGENT_POOL)}</Dial></Response>"
+TWIML_BY_COUNTRY = {"US": _TWIML_US}
+
+# caller_country -> (TaskRouter queue SID, fallback dial target) for route_to_human
+_ROUTES = {"US": (US_SUPPORT_QUEUE_SID, US_AGENT_POOL)}
+_DEFAULT_ROUTE = (INDIA_SUPPORT_QUEUE_SID, INDIA_AGENT_POOL)
+
+# call_sid -> caller_country; a call's country never changes, so repeat
+# routing attempts skip both the DB lookup and the Twilio fetch
+COUNTRY_CACHE_SIZE = 10_000
+COUNTRY_CACHE_TTL = 600  # seconds
+_countries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+_countries_lock = threading.Lock()
+
+# TaskRouter task attributes; a well-formed CallSid needs no JSON escaping, so
+# it is formatted straight in and anything else goes through json.dumps
+_ATTR_TMPL = '{{"call_sid":"{}","type":"support"}}'
+_CALL_SID_RE = re.compile(r"^CA[0-9a-f]{32}$")
+
+# Strong references to fire-and-forget tasks so they are not collected mid-run
+_background_tasks: "set[asyncio.Task]" = set()
+
+
+def _cached_country(call_sid: str) -> Optional[str]:
+    with _countries_lock:
+        entry = _countries.get(call_sid)
+        if entry is None:
+            return None
+        country, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del _countries[call_sid]
+            return None
+        return country
+
+
+def _cache_country(call_sid: str, country: str) -> None:
+    with _countries_lock:
+        _countries[call_sid] = (country, time.monotonic() + COUNTRY_CACHE_TTL)
+        _countries.move_to_end(call_sid)
+        if len(_countries) > COUNTRY_CACHE_SIZE:
+            _countries.popitem(last=False)
+
+
+def _log_call_fetch_error(call_sid: str, exc: Exception) -> None:
+    if isinstance(exc, TwilioRestException):
+        # Twilio returned an API error (e.g., 20404 resource not found)
+        log_event_async(call_sid, "TWILIO_CALL_FETCH_FAILED", {"status": exc.status, "code": exc.code, "msg": str(exc)})
+    else:
+        log_event_async(call_sid, "TWILIO_CALL_FETCH_ERROR", {"error": str(exc)})
+
+
+def _db_caller_country(call_sid: str, db: Optional[Session] = None) -> Optional[str]:
+    if db is None:
+        with SessionLocal() as db:
+            return _db_caller_country(call_sid, db)
+    return db.query(Call.caller_country).filter_by(twilio_call_sid=call_sid).scalar()
+
+
+def _get_caller_country(call_sid: str) -> Optional[str]:
+    """Return the caller's country from the cache, the Call row, or Twilio.
+
+    The DB read uses its own short session, closed before any Twilio fetch.
+    Only known countries are cached; a miss is retried on the next lookup.
+    """
+    caller_country = _cached_country(call_sid) or _db_caller_country(call_sid)
+
+    # If not in DB, fetch from Twilio
+    if not caller_country:
+        try:
+            tw_call = client.calls(call_sid).fetch()
+            caller_country = getattr(tw_call, "caller_country", None)
+        except Exception as exc:
+            _log_call_fetch_error(call_sid, exc)
+
+    if caller_country:
+        _cache_country(call_sid, caller_country)
+    return caller_country
+
+
+async def _get_caller_country_async(call_sid: str) -> Optional[str]:
+    """`_get_caller_country` for the event loop: DB in a thread, Twilio via aiohttp."""
+    caller_country = _cached_country(call_sid) or await asyncio.to_thread(_db_caller_country, call_sid)
+
+    if not caller_country:
+        try:
+            tw_call = await get_async_twilio_client().calls(call_sid).fetch_async()
+            caller_country = getattr(tw_call, "caller_country", None)
+        except Exception as exc:
+            _log_call_fetch_error(call_sid, exc)
+
+    if caller_country:
+        _cache_country(call_sid, caller_country)
+    return caller_country
+
+
+def _record_decision(call_sid: str, caller_country: Optional[str], rule: str, routed_to: Optional[str]) -> None:
+    """Persist one RoutingDecision in its own session."""
+    with SessionLocal() as db:
+        db.add(RoutingDecision(
+            call_id=resolve_call_id(db, call_sid),
+            caller_country=caller_country,
+            routing_rule=rule,
+            routed_to=routed_to,
+        ))
+        db.commit()
+
+
+async def _persist_routing_decision(call_sid: str, caller_country: Optional[str], rule: str, routed_to: Optional[str]) -> None:
+    try:
+        await asyncio.to_thread(_record_decision, call_sid, caller_country, rule, routed_to)
+    except Exception as exc:
+        log_event_async(call_sid, "ROUTING_DECISION_PERSIST_FAILED", {"error": str(exc), "routing_rule": rule})
+
 
 async def route_call(call_sid: str) -> None:
     """Location-based routing (no AI in this layer).
 
-    - Looks up the call on Twilio
+    - Looks up the caller's country (cache, DB, then Twilio)
     - Uses caller_country to choose US vs India pool
     - Updates the call TwiML to dial the chosen target
-    """
-    call = client.calls(call_sid).fetch()
 
-    # Twilio Call resource has caller_country for inbound calls
-    caller_country = getattr(call, "caller_country", None)
+    Twilio requests use the async client and DB work runs in a thread, so
+    the event loop is never blocked on either round trip. The routing
+    decision is written in the background.
+    """
+    caller_country = await _get_caller_country_async(call_sid)
 
     if caller_country == "US":
         target = US_AGENT_POOL
     else:
         target = INDIA_AGENT_POOL
 
-    log_event(call_sid, "ROUTING_DECISION", {
+    log_event_async(call_sid, "ROUTING_DECISION", {
         "caller_country": caller_country,
         "target": target,
     })
 
-    # Persist deterministic routing decision in routing_decisions table
-    db = SessionLocal()
-    try:
-        call_row = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-        routing = RoutingDecision(
-            call_id=call_row.id if call_row else None,
-            caller_country=caller_country,
-            routing_rule="CALLER_COUNTRY",
-            routed_to=target,
-        )
-        db.add(routing)
-        db.commit()
-    finally:
-        db.close()
+    # Persist deterministic routing decision in routing_decisions table; the
+    # record is audit-only, so the live call is updated without waiting on it
+    task = asyncio.create_task(_persist_routing_decision(call_sid, caller_country, "CALLER_COUNTRY", target))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
     # Update live call to dial the selected target
-    client.calls(call_sid).update(
-        twiml=f"""
-<Response>
-    <Dial>{target}</Dial>
-</Response>
-"""
+    await get_async_twilio_client().calls(call_sid).update_async(
+        twiml=TWIML_BY_COUNTRY.get(caller_country, _TWIML_INDIA)
     )
 
 
@@ -71,113 +188,70 @@ def enqueue_taskrouter_task(call_sid: str, queue_sid: str) -> Optional[str]:
 
     Returns the task SID on success or None on failure.
     """
-    if not settings.TASKROUTER_WORKSPACE_SID or not queue_sid:
-        log_event(call_sid, "TASKROUTER_NOT_CONFIGURED", {})
+    if not TASKROUTER_WORKSPACE_SID or not queue_sid:
+        log_event_async(call_sid, "TASKROUTER_NOT_CONFIGURED", {})
         return None
 
     try:
-        attributes = json.dumps({"call_sid": call_sid, "type": "support"})
-        task = client.taskrouter.workspaces(settings.TASKROUTER_WORKSPACE_SID).tasks.create(
+        if _CALL_SID_RE.fullmatch(call_sid):
+            attributes = _ATTR_TMPL.format(call_sid)
+        else:
+            attributes = json.dumps({"call_sid": call_sid, "type": "support"})
+        task = client.taskrouter.workspaces(TASKROUTER_WORKSPACE_SID).tasks.create(
             task_queue_sid=queue_sid,
             attributes=attributes,
         )
-        log_event(call_sid, "TASKROUTER_TASK_CREATED", {"task_sid": task.sid, "queue_sid": queue_sid})
+        log_event_async(call_sid, "TASKROUTER_TASK_CREATED", {"task_sid": task.sid, "queue_sid": queue_sid})
         return getattr(task, "sid", None)
     except Exception as exc:
-        log_event(call_sid, "TASKROUTER_TASK_CREATE_FAILED", {"error": str(exc)})
+        log_event_async(call_sid, "TASKROUTER_TASK_CREATE_FAILED", {"error": str(exc)})
         return None
 
 
 def route_to_human(call_sid: str) -> None:
     """Route a live call to a human via TaskRouter (preferred) or Dial fallback.
 
-    Chooses queue by caller_country stored in Twilio call or DB.
+    Chooses queue by caller_country stored in Twilio call or DB. No DB
+    session is open during the Twilio requests: the country is read in one
+    short session and the routing decision is committed in another once
+    Twilio has answered.
     """
-    # Try DB first for caller country
-    db = SessionLocal()
-    try:
-        call_row = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-        caller_country = call_row.caller_country if call_row else None
-    finally:
-        db.close()
+    caller_country = _get_caller_country(call_sid)
+    decision = _route_to_human(call_sid, caller_country)
+    if decision:
+        rule, routed_to = decision
+        _record_decision(call_sid, caller_country, rule, routed_to)
 
-    # If not in DB, fetch from Twilio
-    if not caller_country:
-        try:
-            tw_call = client.calls(call_sid).fetch()
-            caller_country = getattr(tw_call, "caller_country", None)
-        except TwilioRestException as tre:
-            # Twilio returned an API error (e.g., 20404 resource not found)
-            log_event(call_sid, "TWILIO_CALL_FETCH_FAILED", {"status": tre.status, "code": tre.code, "msg": str(tre)})
-            caller_country = None
-        except Exception as exc:
-            log_event(call_sid, "TWILIO_CALL_FETCH_ERROR", {"error": str(exc)})
-            caller_country = None
 
-    if caller_country == "US":
-        queue_sid = settings.US_SUPPORT_QUEUE_SID
-        dial_target = settings.US_AGENT_POOL
-    else:
-        queue_sid = settings.INDIA_SUPPORT_QUEUE_SID
-        dial_target = settings.INDIA_AGENT_POOL
+def _route_to_human(call_sid: str, caller_country: Optional[str]) -> Optional[tuple[str, str]]:
+    """Do the Twilio side of `route_to_human`; returns (routing_rule, routed_to) to persist."""
+    queue_sid, dial_target = _ROUTES.get(caller_country, _DEFAULT_ROUTE)
 
     # Prefer TaskRouter enqueue
     task_sid = None
-    if queue_sid and settings.TASKROUTER_WORKSPACE_SID:
+    if queue_sid and TASKROUTER_WORKSPACE_SID:
         task_sid = enqueue_taskrouter_task(call_sid, queue_sid)
 
     if task_sid:
-        log_event(call_sid, "ROUTED_TO_TASKROUTER", {"task_sid": task_sid, "queue_sid": queue_sid})
-        # Persist routing decision
-        db = SessionLocal()
-        try:
-            call_row = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-            routing = RoutingDecision(
-                call_id=call_row.id if call_row else None,
-                caller_country=caller_country,
-                routing_rule="TASKROUTER_QUEUE",
-                routed_to=queue_sid,
-            )
-            db.add(routing)
-            db.commit()
-        finally:
-            db.close()
-        return
+        log_event_async(call_sid, "ROUTED_TO_TASKROUTER", {"task_sid": task_sid, "queue_sid": queue_sid})
+        return "TASKROUTER_QUEUE", queue_sid
 
     # Fallback: update live call to dial a static agent/queue number
-    log_event(call_sid, "ROUTING_FALLBACK_DIAL", {"target": dial_target})
+    log_event_async(call_sid, "ROUTING_FALLBACK_DIAL", {"target": dial_target})
     try:
-        client.calls(call_sid).update(
-            twiml=f"""
-<Response>
-    <Dial>{dial_target}</Dial>
-</Response>
-"""
-        )
-        # persist routing decision
-        db = SessionLocal()
-        try:
-            call_row = db.query(Call).filter_by(twilio_call_sid=call_sid).one_or_none()
-            routing = RoutingDecision(
-                call_id=call_row.id if call_row else None,
-                caller_country=caller_country,
-                routing_rule="FALLBACK_DIAL",
-                routed_to=dial_target,
-            )
-            db.add(routing)
-            db.commit()
-        finally:
-            db.close()
+        client.calls(call_sid).update(twiml=TWIML_BY_COUNTRY.get(caller_country, _TWIML_INDIA))
+        return "FALLBACK_DIAL", dial_target
     except TwilioRestException as tre:
         # Common case: call resource not found in this Twilio account
-        log_event(call_sid, "ROUTING_UPDATE_TWILIO_ERROR", {"status": tre.status, "code": tre.code, "msg": str(tre)})
+        log_event_async(call_sid, "ROUTING_UPDATE_TWILIO_ERROR", {"status": tre.status, "code": tre.code, "msg": str(tre)})
 
         # If TaskRouter is available, create a task so agents can follow up
-        if settings.TASKROUTER_WORKSPACE_SID and queue_sid:
+        if TASKROUTER_WORKSPACE_SID and queue_sid:
             try:
                 tsid = enqueue_taskrouter_task(call_sid, queue_sid)
-                log_event(call_sid, "TASK_CREATED_AFTER_TWILIO_ERROR", {"task_sid": tsid})
+                log_event_async(call_sid, "TASK_CREATED_AFTER_TWILIO_ERROR", {"task_sid": tsid})
             except Exception as exc:
-                log_event(call_sid, "TASK_CREATE_AFTER_TWILIO_ERROR_FAILED", {"error": str(exc)})
+                log_event_async(call_sid, "TASK_CREATE_AFTER_TWILIO_ERROR_FAILED", {"error": str(exc)})
     except Exception as exc:
-        log_event(call_sid, "ROUTING_UPDATE_FAILED", {"error": str(exc)})
+        log_event_async(call_sid, "ROUTING_UPDATE_FAILED", {"error": str(exc)})
+    return None
@@ -1,53 +1,314 @@
 from __future__ import annotations
 
-from typing import List
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+import asyncio
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 from backend.config import get_settings
 from backend.services.logger import log_event
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 settings = get_settings()
 
-# Simple in-process cache for verified numbers
+# In-process cache for verified numbers. Refreshes build a new dict and swap
+# it in with one assignment, so readers never see a half-updated cache.
 _cache: dict = {
-    "numbers": [],
+    "numbers": frozenset(),
+    "by_prefix": {},
     "fetched_at": 0,
 }
+# Single-flight: only one Twilio fetch runs at a time
+_refresh_lock = threading.Lock()
+_refresh_inflight = False
+_inflight_lock = threading.Lock()
 CACHE_TTL = 300  # seconds
+REFRESH_INTERVAL = 60  # seconds between background refreshes
+
+# With REDIS_URL set, workers share one fetch per CACHE_TTL: the worker
+# holding the lock key refreshes from Twilio, the rest read its blob
+SHARED_CACHE_KEY = "twilio:verified_numbers"
+SHARED_LOCK_KEY = "twilio:verified_numbers:lock"
+SHARED_LOCK_TTL = 10  # seconds
+SHARED_CACHE_TIMEOUT = 0.5  # seconds; an unreachable Redis must not stall refreshes
+
+# Twilio's maximum page size; the default of 50 costs 20x the round trips
+LIST_PAGE_SIZE = 1000
+
+# Lists outgoing caller IDs while the calling thread lists incoming numbers
+_list_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="twilio-list")
+
+# Connection pool sizing for the shared Twilio REST client
+POOL_CONNECTIONS = 20
+POOL_MAXSIZE = 50
+RETRY_BACKOFF_MAX = 0.5  # seconds; caps the wait between idempotent retries
+
+
+@lru_cache(maxsize=1)
+def get_twilio_client() -> Client:
+    """Return the process-wide Twilio REST client.
+
+    The client keeps a pooled keep-alive `requests.Session`, so every Twilio
+    call after the first reuses an established TLS connection instead of
+    paying a fresh handshake. Idempotent requests (fetches and lists) are
+    retried on connection errors and 429/5xx; call updates and task creation
+    are not, so they are never sent twice. Retries ignore Retry-After and wait
+    at most RETRY_BACKOFF_MAX, so a throttled fetch on a webhook path fails
+    fast instead of sleeping into Twilio's 15 s webhook timeout.
+    """
+    http_client = TwilioHttpClient(pool_connections=True)
+    http_client.session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                backoff_max=RETRY_BACKOFF_MAX,
+                respect_retry_after_header=False,
+                status_forcelist=(429, 500, 502, 503, 504),
+                raise_on_status=False,
+            ),
+        ),
+    )
+    return Client(
+        settings.TWILIO_ACCOUNT_SID,
+        settings.TWILIO_AUTH_TOKEN,
+        http_client=http_client,
+    )
 
 
-def _fetch_verified_from_twilio() -> List[str]:
+def warm_twilio_client() -> None:
+    """Open the shared client's first TLS connection with a cheap account fetch.
+
+    Called at startup so the first routed call reuses an established
+    connection instead of paying the handshake.
+    """
     try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        numbers = set()
-        # Incoming phone numbers owned by the account
-        for rec in client.incoming_phone_numbers.list():
-            numbers.add(rec.phone_number)
+        get_twilio_client().api.accounts(settings.TWILIO_ACCOUNT_SID).fetch()
+    except Exception as e:
+        log_event(None, "TWILIO_WARMUP_FAILED", {"error": str(e)})
 
-        # Outgoing caller IDs (verified caller IDs) - may be empty or deprecated on some accounts
-        try:
-            for rec in client.outgoing_caller_ids.list():
-                # Twilio returns phone_number field
-                numbers.add(rec.phone_number)
-        except Exception:
-            # Non-fatal: older accounts or permissions may not expose this resource
-            pass
-
-        return sorted(numbers)
+
+@lru_cache(maxsize=1)
+def get_async_twilio_client() -> Client:
+    """Return the process-wide Twilio client for `*_async` resource methods.
+
+    Backed by a pooled aiohttp session, so coroutines can await Twilio
+    without tying up a thread. Close it with `close_async_twilio_client`.
+    """
+    return Client(
+        settings.TWILIO_ACCOUNT_SID,
+        settings.TWILIO_AUTH_TOKEN,
+        http_client=AsyncTwilioHttpClient(pool_connections=True),
+    )
+
+
+async def close_async_twilio_client() -> None:
+    """Close the async client's HTTP session if it was ever created."""
+    if get_async_twilio_client.cache_info().currsize:
+        await get_async_twilio_client().http_client.close()
+        get_async_twilio_client.cache_clear()
+
+
+def country_prefix(num: str) -> str:
+    """Return the dialing prefix used to match caller IDs to agent numbers."""
+    if not num or not num.startswith("+"):
+        return ""
+    if num.startswith("+91"):
+        return "+91"
+    if num.startswith("+1"):
+        return "+1"
+    return num[:3]
+
+
+def group_by_country_prefix(numbers: Iterable[str]) -> Dict[str, Tuple[str, ...]]:
+    """Group numbers into sorted pools keyed by country prefix."""
+    pools: Dict[str, list] = {}
+    for num in numbers:
+        pools.setdefault(country_prefix(num), []).append(num)
+    return {prefix: tuple(sorted(nums)) for prefix, nums in pools.items()}
+
+
+def _list_outgoing_caller_ids(client: Client) -> set:
+    # Verified caller IDs may be empty or deprecated on some accounts
+    try:
+        return {rec.phone_number for rec in client.outgoing_caller_ids.stream(page_size=LIST_PAGE_SIZE)}
+    except Exception:
+        # Non-fatal: older accounts or permissions may not expose this resource
+        return set()
+
+
+def _fetch_verified_from_twilio() -> Optional[FrozenSet[str]]:
+    """Return the account's verified numbers, or None if Twilio could not be read.
+
+    None (not an empty set) lets callers keep their previous snapshot instead
+    of wiping it on a transient error.
+    """
+    try:
+        client = get_twilio_client()
+        # The two list endpoints are independent; page through them concurrently,
+        # consuming each page as it arrives
+        outgoing = _list_executor.submit(_list_outgoing_caller_ids, client)
+        numbers = {rec.phone_number for rec in client.incoming_phone_numbers.stream(page_size=LIST_PAGE_SIZE)}
+        numbers.update(outgoing.result())
+        return frozenset(numbers)
     except Exception as e:
         log_event(None, "TWILIO_VERIFIED_FETCH_ERROR", {"error": str(e)})
-        return []
+        return None
 
 
-def get_verified_numbers() -> List[str]:
-    now = int(time.time())
-    if _cache["numbers"] and (now - _cache["fetched_at"] < CACHE_TTL):
-        return _cache["numbers"]
+@lru_cache(maxsize=1)
+def _shared_cache():
+    """Return the Redis client shared by all workers, or None if not configured."""
+    if not REDIS_AVAILABLE or not settings.REDIS_URL:
+        return None
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=SHARED_CACHE_TIMEOUT,
+        socket_connect_timeout=SHARED_CACHE_TIMEOUT,
+    )
+
+
+def _fetch_verified_shared(force: bool = False) -> Optional[FrozenSet[str]]:
+    """Fetch verified numbers, going through the shared Redis cache if configured.
+
+    Returns None when the Twilio fetch fails, or when another worker holds the
+    refresh lock and this process already has numbers; either way the current
+    numbers are kept. Redis errors fall back to fetching from Twilio directly.
+    """
+    shared = _shared_cache()
+    if shared is None:
+        return _fetch_verified_from_twilio()
+
+    try:
+        if not force:
+            blob = shared.get(SHARED_CACHE_KEY)
+            if blob is not None:
+                return frozenset(orjson.loads(blob))
+        if not shared.set(SHARED_LOCK_KEY, b"1", nx=True, ex=SHARED_LOCK_TTL) and not force:
+            if _cache["fetched_at"]:
+                return None
+    except Exception as e:
+        log_event(None, "TWILIO_VERIFIED_SHARED_CACHE_ERROR", {"error": str(e)})
+        return _fetch_verified_from_twilio()
 
     nums = _fetch_verified_from_twilio()
-    _cache["numbers"] = nums
-    _cache["fetched_at"] = now
-    log_event(None, "TWILIO_VERIFIED_NUMBERS_REFRESH", {"count": len(nums)})
+    # An empty result is usually a failed fetch; don't push it to every worker
+    if nums:
+        try:
+            shared.setex(SHARED_CACHE_KEY, CACHE_TTL, orjson.dumps(sorted(nums)))
+        except Exception as e:
+            log_event(None, "TWILIO_VERIFIED_SHARED_CACHE_ERROR", {"error": str(e)})
+    return nums
+
+
+def _refresh_locked(force: bool = False) -> FrozenSet[str]:
+    # Caller holds _refresh_lock
+    global _cache
+    nums = _fetch_verified_shared(force)
+    if nums is None:
+        return _cache["numbers"]
+    changed = nums != _cache["numbers"]
+    _cache = {
+        "numbers": nums,
+        "by_prefix": group_by_country_prefix(nums),
+        "fetched_at": int(time.time()),
+    }
+    if changed:
+        log_event(None, "TWILIO_VERIFIED_NUMBERS_REFRESH", {"count": len(nums)})
     return nums
+
+
+def refresh_verified_numbers(force: bool = False) -> FrozenSet[str]:
+    """Fetch verified numbers and store them in the cache.
+
+    With `force`, Twilio is queried even if another worker's shared copy
+    is still fresh.
+    """
+    with _refresh_lock:
+        return _refresh_locked(force)
+
+
+def _refresh_in_background() -> None:
+    """Start one refresh thread unless a refresh is already in flight."""
+    global _refresh_inflight
+    with _inflight_lock:
+        if _refresh_inflight:
+            return
+        _refresh_inflight = True
+
+    def run() -> None:
+        global _refresh_inflight
+        try:
+            refresh_verified_numbers()
+        except Exception as e:
+            log_event(None, "TWILIO_VERIFIED_REFRESH_ERROR", {"error": str(e)})
+        finally:
+            with _inflight_lock:
+                _refresh_inflight = False
+
+    threading.Thread(target=run, name="verified-numbers-refresh", daemon=True).start()
+
+
+async def run_verified_numbers_refresher(interval: int = REFRESH_INTERVAL) -> None:
+    """Keep the verified-numbers cache warm so webhooks never wait on Twilio.
+
+    Started as a background task on app startup; the blocking Twilio fetch runs
+    in a worker thread so the event loop stays free.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(refresh_verified_numbers)
+        except Exception as e:
+            log_event(None, "TWILIO_VERIFIED_REFRESH_ERROR", {"error": str(e)})
+        await asyncio.sleep(interval)
+
+
+def _current_cache() -> dict:
+    """Return a populated cache, serving stale data while it revalidates.
+
+    The background refresher normally keeps the cache fresh. Past CACHE_TTL
+    the stale snapshot is still returned and a single refresh is started.
+    Only a cold start waits on Twilio, and concurrent cold callers share
+    that one fetch.
+    """
+    cache = _cache
+    if cache["fetched_at"]:
+        if int(time.time()) - cache["fetched_at"] >= CACHE_TTL:
+            _refresh_in_background()
+        return cache
+
+    with _refresh_lock:
+        if not _cache["fetched_at"]:
+            _refresh_locked()
+    return _cache
+
+
+def get_verified_numbers() -> FrozenSet[str]:
+    """Return cached verified numbers as a set for O(1) membership checks.
+
+    For a stable order use `get_verified_numbers_by_prefix`, whose pools
+    are sorted.
+    """
+    return _current_cache()["numbers"]
+
+
+def get_verified_numbers_by_prefix() -> Dict[str, Tuple[str, ...]]:
+    """Return cached verified numbers grouped by country prefix."""
+    return _current_cache()["by_prefix"]